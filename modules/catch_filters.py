@@ -0,0 +1,271 @@
+import importlib
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+import numpy
+from jsonschema import ValidationError, validate
+from ruamel.yaml import YAMLError
+
+from modules.config import catch_filters_schema, config_dir_stack, yaml
+from modules.console import console
+from modules.pokemon import Pokemon
+
+if TYPE_CHECKING:
+    from modules.encounter_database import EncounterDatabase
+
+# Fields that a rule can filter on, and what they are called in `get_encounter_fields()`.
+_name_fields = ["species", "nature", "ability", "held_item", "hidden_power"]
+_iv_fields = ["hp", "attack", "defence", "speed", "special_attack", "special_defence"]
+
+
+def get_encounter_fields(pokemon: Pokemon) -> dict:
+    """
+    :return: All values of a Pokémon that catch filter rules can look at
+    """
+    ivs = pokemon.ivs
+    return {
+        "species": pokemon.species.name,
+        "nature": pokemon.nature.name,
+        "ability": pokemon.ability.name,
+        "held_item": pokemon.held_item.name if pokemon.held_item else None,
+        "hidden_power": pokemon.hidden_power_type.name,
+        "shiny_value": pokemon.shiny_value,
+        "hp": ivs.hp,
+        "attack": ivs.attack,
+        "defence": ivs.defence,
+        "speed": ivs.speed,
+        "special_attack": ivs.special_attack,
+        "special_defence": ivs.special_defence,
+    }
+
+
+def _is_in(values: numpy.ndarray, names: set) -> numpy.ndarray:
+    # `numpy.isin()` is a lot slower than this for arrays of strings, because it has to sort them first.
+    return numpy.fromiter(map(names.__contains__, values), dtype=bool, count=len(values))
+
+
+class CatchFilterRule:
+    """
+    A single rule from `catch_filters.yml`, which matches if all of its conditions match.
+
+    Every condition is compiled twice: Once into a plain Python function that checks a single encounter
+    (see `get_encounter_fields()`), and once into a function that checks a whole batch of encounters
+    at once, where every field is a NumPy array.
+    """
+
+    def __init__(self, rule: dict):
+        self.name: str = rule.get("name", "Unnamed rule")
+        self.species: set[str] | None = set(rule["species"]) if "species" in rule else None
+        self._checks: list[Callable[[dict], bool]] = []
+        self._batch_checks: list[Callable[[dict], numpy.ndarray]] = []
+
+        # `species` is not checked here, because rules are only evaluated for the species they apply to anyway.
+        for field in _name_fields[1:]:
+            if field in rule:
+                self._add_name_condition(field, rule[field])
+        if "shiny" in rule:
+            self._add_range_condition("shiny_value", {"max": 7} if rule["shiny"] else {"min": 8})
+        if "shiny_value" in rule:
+            self._add_range_condition("shiny_value", rule["shiny_value"])
+        for field, value_range in rule.get("ivs", {}).items():
+            self._add_range_condition(field, value_range)
+        if "iv_sum" in rule:
+            self._add_iv_sum_condition(rule["iv_sum"])
+        if "perfect_ivs" in rule:
+            self._add_perfect_ivs_condition(rule["perfect_ivs"])
+        if rule.get("identical_ivs", False):
+            self._checks.append(lambda f: all(f[iv] == f["hp"] for iv in _iv_fields))
+            self._batch_checks.append(
+                lambda f: (f["hp"] == f["attack"])
+                & (f["hp"] == f["defence"])
+                & (f["hp"] == f["speed"])
+                & (f["hp"] == f["special_attack"])
+                & (f["hp"] == f["special_defence"])
+            )
+
+    def _add_name_condition(self, field: str, names: list[str]) -> None:
+        allowed_names = set(names)
+        self._checks.append(lambda f: f[field] in allowed_names)
+        self._batch_checks.append(lambda f: _is_in(f[field], allowed_names))
+
+    def _add_range_condition(self, field: str, value_range: dict) -> None:
+        minimum = value_range.get("min", -(2**31))
+        maximum = value_range.get("max", 2**31)
+        self._checks.append(lambda f: minimum <= f[field] <= maximum)
+        self._batch_checks.append(lambda f: (f[field] >= minimum) & (f[field] <= maximum))
+
+    def _add_iv_sum_condition(self, value_range: dict) -> None:
+        minimum = value_range.get("min", 0)
+        maximum = value_range.get("max", 186)
+
+        def check(f: dict) -> bool:
+            iv_sum = f["hp"] + f["attack"] + f["defence"] + f["speed"] + f["special_attack"] + f["special_defence"]
+            return minimum <= iv_sum <= maximum
+
+        def batch_check(f: dict) -> numpy.ndarray:
+            iv_sum = sum(f[iv].astype(numpy.int16) for iv in _iv_fields)
+            return (iv_sum >= minimum) & (iv_sum <= maximum)
+
+        self._checks.append(check)
+        self._batch_checks.append(batch_check)
+
+    def _add_perfect_ivs_condition(self, value_range: dict) -> None:
+        minimum = value_range.get("min", 0)
+        maximum = value_range.get("max", 6)
+
+        def check(f: dict) -> bool:
+            return minimum <= sum(1 for iv in _iv_fields if f[iv] == 31) <= maximum
+
+        def batch_check(f: dict) -> numpy.ndarray:
+            count = sum((f[iv] == 31).astype(numpy.int8) for iv in _iv_fields)
+            return (count >= minimum) & (count <= maximum)
+
+        self._checks.append(check)
+        self._batch_checks.append(batch_check)
+
+    def matches(self, fields: dict) -> bool:
+        for check in self._checks:
+            if not check(fields):
+                return False
+        return True
+
+    def matches_batch(self, fields: dict[str, numpy.ndarray]) -> numpy.ndarray:
+        result = numpy.ones(len(fields["species"]), dtype=bool)
+        if self.species is not None:
+            result &= _is_in(fields["species"], self.species)
+        for check in self._batch_checks:
+            result &= check(fields)
+        return result
+
+
+class CatchFilters:
+    """
+    Compiled version of `catch_filters.yml`.
+
+    Rules are indexed by species, so that checking an encounter only runs the rules that either apply
+    to that species or to all species.
+    """
+
+    def __init__(self, data: dict):
+        self.exceptions: set[str] = set(data.get("exceptions") or [])
+        self.rules: list[CatchFilterRule] = [
+            CatchFilterRule(rule) for rule in data.get("rules") or [] if rule.get("enable", True)
+        ]
+        self._rules_for_all_species: list[CatchFilterRule] = []
+        self._rules_by_species: dict[str, list[CatchFilterRule]] = {}
+        for rule in self.rules:
+            if rule.species is None:
+                self._rules_for_all_species.append(rule)
+            else:
+                for species in rule.species:
+                    self._rules_by_species.setdefault(species, []).append(rule)
+
+    def get_matching_rule(self, pokemon: Pokemon) -> CatchFilterRule | None:
+        """
+        :return: The first rule that matches this Pokémon, or None if none of them do
+        """
+        if pokemon.species.name in self.exceptions:
+            return None
+
+        rules = self._rules_by_species.get(pokemon.species.name)
+        if rules is None and len(self._rules_for_all_species) == 0:
+            return None
+
+        fields = get_encounter_fields(pokemon)
+        for rule in rules or []:
+            if rule.matches(fields):
+                return rule
+        for rule in self._rules_for_all_species:
+            if rule.matches(fields):
+                return rule
+        return None
+
+    def matches_batch(self, fields: dict[str, numpy.ndarray]) -> numpy.ndarray:
+        """
+        Checks a whole batch of encounters at once, e.g. to find out which previous encounters would have
+        been caught with the current rules.
+
+        :param fields: The same keys as returned by `get_encounter_fields()`, but every value is an array
+                       containing that field's value for all encounters.
+        :return: A boolean array that is True for every encounter that matches at least one rule
+        """
+        result = numpy.zeros(len(fields["species"]), dtype=bool)
+        for rule in self.rules:
+            result |= rule.matches_batch(fields)
+        if len(self.exceptions) > 0:
+            result &= ~_is_in(fields["species"], self.exceptions)
+        return result
+
+    def find_matching_encounters(self, encounter_database: "EncounterDatabase") -> numpy.ndarray:
+        """
+        :return: IDs of all encounters in the encounter database that match at least one rule
+        """
+        matching_ids = [ids[self.matches_batch(fields)] for ids, fields in encounter_database.iter_encounter_fields()]
+        return numpy.concatenate(matching_ids) if len(matching_ids) > 0 else numpy.zeros(0, dtype=numpy.int64)
+
+
+_catch_filters: CatchFilters | None = None
+_catch_filters_file: Path | None = None
+_catch_filters_mtime: float = 0
+_last_reload_check: float = 0
+
+
+def _find_catch_filters_file() -> Path | None:
+    # Like `load_config()`, the profile's file takes precedence over the global one.
+    result = None
+    for config_dir in config_dir_stack:
+        if (config_dir / "catch_filters.yml").is_file():
+            result = config_dir / "catch_filters.yml"
+    return result
+
+
+def load_custom_catch_filters(profile_path: Path) -> Callable[[Pokemon], bool]:
+    """
+    :param profile_path: Directory of the profile
+    :return: The `custom_catch_filters()` function from the profile's `customcatchfilters.py`, or the global
+             one from `profiles/` if the profile does not have its own
+    """
+    if (profile_path / "customcatchfilters.py").is_file():
+        return importlib.import_module(".customcatchfilters", f"profiles.{profile_path.name}").custom_catch_filters
+    else:
+        from profiles.customcatchfilters import custom_catch_filters
+
+        return custom_catch_filters
+
+
+def get_catch_filters() -> CatchFilters:
+    """
+    Returns the compiled rules from `catch_filters.yml`. The file is checked for changes at most once per
+    second and reloaded if it has been modified, so rules can be edited while the bot is running.
+    If the modified file is invalid, the previous rules will be kept.
+    """
+    global _catch_filters, _catch_filters_file, _catch_filters_mtime, _last_reload_check
+
+    if _catch_filters is not None and time.time() - _last_reload_check < 1:
+        return _catch_filters
+    _last_reload_check = time.time()
+
+    file = _find_catch_filters_file()
+    if file is None:
+        if _catch_filters is None:
+            _catch_filters = CatchFilters({})
+        return _catch_filters
+
+    mtime = file.stat().st_mtime
+    if _catch_filters is None or file != _catch_filters_file or mtime != _catch_filters_mtime:
+        try:
+            with open(file, mode="r", encoding="utf-8") as f:
+                data = yaml.load(f)
+            validate(data, yaml.load(catch_filters_schema))
+            _catch_filters = CatchFilters(data)
+            if _catch_filters_file is not None:
+                console.print(f"[green]Reloaded catch filters from {file}.[/]")
+        except (OSError, YAMLError, ValidationError):
+            console.print(f"[bold red]Catch filter file {file} is invalid![/]")
+            if _catch_filters is None:
+                _catch_filters = CatchFilters({})
+        _catch_filters_file = file
+        _catch_filters_mtime = mtime
+
+    return _catch_filters
@@ -68,6 +68,20 @@ logging_schema = """
                 type: boolean
     import_pk3:
         type: boolean
+    custom_hooks:
+        type: object
+        properties:
+            workers:
+                type: integer
+                minimum: 1
+            queue_size:
+                type: integer
+                minimum: 1
+            overflow:
+                type: string
+                enum:
+                    - drop
+                    - coalesce
 """
 
 discord_schema = """
@@ -182,6 +196,10 @@ properties:
                 type: string
             port:
                 type: integer
+            video_fps:
+                type: integer
+                minimum: 1
+                maximum: 60
 """
 
 cheats_schema = """
@@ -191,6 +209,10 @@ properties:
         type: boolean
     starters_rng:
         type: boolean
+    fast_reset:
+        type: boolean
+    starters_prediction:
+        type: boolean
 """
 
 catch_block_schema = """
@@ -200,6 +222,46 @@ properties:
         type: array
 """
 
+_catch_filter_range_schema = (
+    "{type: object, properties: {min: {type: integer}, max: {type: integer}}, additionalProperties: false}"
+)
+
+catch_filters_schema = f"""
+type: object
+properties:
+    exceptions:
+        type: array
+        items: {{type: string}}
+    rules:
+        type: array
+        items:
+            type: object
+            properties:
+                name: {{type: string}}
+                enable: {{type: boolean}}
+                species: {{type: array, items: {{type: string}}}}
+                nature: {{type: array, items: {{type: string}}}}
+                ability: {{type: array, items: {{type: string}}}}
+                held_item: {{type: array, items: {{type: string}}}}
+                hidden_power: {{type: array, items: {{type: string}}}}
+                shiny: {{type: boolean}}
+                shiny_value: {_catch_filter_range_schema}
+                iv_sum: {_catch_filter_range_schema}
+                perfect_ivs: {_catch_filter_range_schema}
+                identical_ivs: {{type: boolean}}
+                ivs:
+                    type: object
+                    properties:
+                        hp: {_catch_filter_range_schema}
+                        attack: {_catch_filter_range_schema}
+                        defence: {_catch_filter_range_schema}
+                        speed: {_catch_filter_range_schema}
+                        special_attack: {_catch_filter_range_schema}
+                        special_defence: {_catch_filter_range_schema}
+                    additionalProperties: false
+            additionalProperties: false
+"""
+
 keys_schema = """
 type: object
 properties:
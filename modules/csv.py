@@ -1,6 +1,39 @@
-import os
+import csv
+import time
 from pathlib import Path
-import pandas as pd
+from threading import Lock, Thread
+
+# These fields of `Pokemon.to_dict()` are not very interesting for encounters, so they are left out of the CSV files.
+_excluded_columns = {
+    "EVs_attack",
+    "EVs_defence",
+    "EVs_hp",
+    "EVs_spAttack",
+    "EVs_spDefense",
+    "EVs_speed",
+    "markings_circle",
+    "markings_heart",
+    "markings_square",
+    "markings_triangle",
+    "moves_0_effect",
+    "moves_1_effect",
+    "moves_2_effect",
+    "moves_3_effect",
+    "pokerus_days",
+    "pokerus_strain",
+    "status_badPoison",
+    "status_burn",
+    "status_freeze",
+    "status_paralysis",
+    "status_poison",
+    "status_sleep",
+    "condition_beauty",
+    "condition_cool",
+    "condition_cute",
+    "condition_feel",
+    "condition_smart",
+    "condition_tough",
+}
 
 
 def flatten_data(data: dict) -> dict:
@@ -22,52 +55,97 @@ def flatten_data(data: dict) -> dict:
     return out
 
 
-def log_encounter_to_csv(total_stats: dict, pokemon_dict: dict, stats_dir_path: Path) -> bool:
-    try:
-        # Log all encounters to a CSV file per phase
-        csv_path = stats_dir_path / "encounters"
-        os.makedirs(csv_path, exist_ok=True)
-        csv_file = csv_path / f"Phase {total_stats['totals'].get('shiny_encounters', 0)} Encounters.csv"
-        pd_pokemon = (
-            pd.DataFrame.from_dict(flatten_data(pokemon_dict), orient="index")
-            .drop(
-                [
-                    "EVs_attack",
-                    "EVs_defence",
-                    "EVs_hp",
-                    "EVs_spAttack",
-                    "EVs_spDefense",
-                    "EVs_speed",
-                    "markings_circle",
-                    "markings_heart",
-                    "markings_square",
-                    "markings_triangle",
-                    "moves_0_effect",
-                    "moves_1_effect",
-                    "moves_2_effect",
-                    "moves_3_effect",
-                    "pokerus_days",
-                    "pokerus_strain",
-                    "status_badPoison",
-                    "status_burn",
-                    "status_freeze",
-                    "status_paralysis",
-                    "status_poison",
-                    "status_sleep",
-                    "condition_beauty",
-                    "condition_cool",
-                    "condition_cute",
-                    "condition_feel",
-                    "condition_smart",
-                    "condition_tough",
-                ],
-                errors="ignore",
-            )
-            .sort_index()
-            .transpose()
+class EncounterCsvWriter:
+    """
+    Logs all encounters to a CSV file per phase (`stats/encounters/Phase <n> Encounters.csv`.)
+
+    `Pokemon.to_dict()` always returns the same keys, so the list of columns is only worked out
+    once. The current phase's file is kept open and only flushed every `flush_interval` seconds
+    (and when it is closed), so logging an encounter usually does not touch the disk at all. A
+    background thread does these flushes, so the file is never more than that out of date even if
+    there are no more encounters for a while.
+    """
+
+    flush_interval: int = 5
+
+    def __init__(self, stats_dir_path: Path):
+        self._directory = stats_dir_path / "encounters"
+        self._columns: list[str] | None = None
+        self._phase: int | None = None
+        self._file = None
+        self._writer = None
+        self._last_flush: float = 0
+        self._has_unflushed_rows: bool = False
+        self._lock = Lock()
+        self._flush_thread: Thread | None = None
+
+    def _open(self, phase: int) -> None:
+        self._close()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(
+            self._directory / f"Phase {phase} Encounters.csv", "a", encoding="utf-8", newline="", buffering=65536
         )
-        header = False if os.path.exists(csv_file) else True
-        pd_pokemon.to_csv(csv_file, mode="a", encoding="utf-8", index=False, header=header)
-        return True
-    except:
-        return False
\ No newline at end of file
+        self._writer = csv.writer(self._file)
+        self._phase = phase
+        if self._file.tell() == 0:
+            self._writer.writerow(self._columns)
+
+        if self._flush_thread is None:
+            self._flush_thread = Thread(target=self._flush_periodically, name="EncounterCsvFlush", daemon=True)
+            self._flush_thread.start()
+
+    def write(self, pokemon_dict: dict, phase: int) -> bool:
+        """
+        :param pokemon_dict: The encountered Pokémon, as returned by `Pokemon.to_dict()`
+        :param phase: Number of the current phase (i.e. number of shinies that have been encountered before)
+        :return: Whether the encounter could be logged
+        """
+        try:
+            row = flatten_data(pokemon_dict)
+            with self._lock:
+                if self._columns is None:
+                    self._columns = sorted(column for column in row if column not in _excluded_columns)
+                if phase != self._phase:
+                    self._open(phase)
+
+                self._writer.writerow([row.get(column) for column in self._columns])
+                self._has_unflushed_rows = True
+
+                if time.time() - self._last_flush >= self.flush_interval:
+                    self._flush()
+            return True
+        except Exception:
+            # Logging an encounter to CSV should never interrupt the bot.
+            return False
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(max(1.0, self._last_flush + self.flush_interval - time.time()))
+            try:
+                with self._lock:
+                    if self._has_unflushed_rows and time.time() - self._last_flush >= self.flush_interval:
+                        self._flush()
+            except Exception:
+                # Same as in `write()`, this should never take down the thread (e.g. if the disk is full.)
+                pass
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+        self._has_unflushed_rows = False
+        self._last_flush = time.time()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+            self._phase = None
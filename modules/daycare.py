@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from enum import IntEnum
 
-from modules.memory import get_save_block, unpack_uint32
+from modules.memory import get_save_block_view, unpack_uint32
 from modules.pokemon import Pokemon, parse_pokemon
 
 
@@ -73,9 +73,10 @@ class DaycareData:
 
 
 def get_daycare_data() -> DaycareData | None:
-    data = get_save_block(1, 0x3030, 0x120)
-    if data is None:
+    save_block = get_save_block_view(1)
+    if save_block is None:
         return None
+    data = save_block.daycare
 
     pokemon1 = parse_pokemon(data[0x00:0x50])
     pokemon2 = parse_pokemon(data[0x8C:0xDC])
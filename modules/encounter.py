@@ -1,11 +1,11 @@
+from modules.catch_filters import get_catch_filters
 from modules.config import config
 from modules.console import console
 from modules.context import context
 from modules.files import save_pk3
-from modules.gui.desktop_notification import desktop_notification
+from modules.multi_instance import check_custom_catch_filters, forward_encounter, is_worker
 from modules.pc_storage import import_into_storage
 from modules.pokemon import Pokemon
-from modules.stats import total_stats
 
 block_list: list = []
 
@@ -30,11 +30,23 @@ def encounter_pokemon(pokemon: Pokemon) -> None:
         config_catch_block = load_config("catch_block.yml", catch_block_schema)
         block_list = config_catch_block["block_list"]
 
-    total_stats.log_encounter(pokemon, block_list)
+    # When running multiple instances, stats are only kept by the supervisor process. Workers never
+    # import `modules.stats`, so they do not create stats files of their own.
+    if is_worker():
+        forward_encounter(pokemon)
+        custom_catch_filters = check_custom_catch_filters
+    else:
+        from modules.stats import total_stats
+
+        total_stats.log_encounter(pokemon, block_list)
+        custom_catch_filters = total_stats.custom_catch_filters
     context.message = f"Encountered a {pokemon.species.name} with a shiny value of {pokemon.shiny_value:,}!"
 
     # TODO temporary until auto-catch is ready
-    custom_found = total_stats.custom_catch_filters(pokemon)
+    matching_rule = get_catch_filters().get_matching_rule(pokemon)
+    if matching_rule is not None:
+        console.print(f"[green]Matched catch filter rule `{matching_rule.name}`.[/]")
+    custom_found = matching_rule is not None or custom_catch_filters(pokemon)
     if pokemon.is_shiny or custom_found:
         if pokemon.is_shiny:
             if not config["logging"]["save_pk3"]["all"] and config["logging"]["save_pk3"]["shiny"]:
@@ -74,7 +86,13 @@ def encounter_pokemon(pokemon: Pokemon) -> None:
 
             context.bot_mode = "Manual"
             context.emulation_speed = 1
-            context.video = True
 
-            if alert_title is not None and alert_message is not None:
-                desktop_notification(title=alert_title, message=alert_message)
+            # In headless mode there is no window to show the game in or a desktop to show a notification
+            # on, and importing anything from `modules.gui` would load Tkinter.
+            if context.gui is not None:
+                context.video = True
+
+                if alert_title is not None and alert_message is not None:
+                    from modules.gui.desktop_notification import desktop_notification
+
+                    desktop_notification(title=alert_title, message=alert_message)
@@ -0,0 +1,361 @@
+import sqlite3
+import threading
+import time
+from functools import cache
+from pathlib import Path
+from typing import Iterator
+
+import numpy
+
+from modules.pokemon import Pokemon, get_species_by_name, get_species_by_index
+
+_schema = """
+    CREATE TABLE IF NOT EXISTS encounters (
+        id INTEGER PRIMARY KEY,
+        encounter_time REAL NOT NULL,
+        phase INTEGER NOT NULL,
+        species_id INTEGER NOT NULL,
+        personality_value INTEGER NOT NULL,
+        shiny_value INTEGER NOT NULL,
+        iv_sum INTEGER NOT NULL,
+        iv_hp INTEGER NOT NULL,
+        iv_attack INTEGER NOT NULL,
+        iv_defence INTEGER NOT NULL,
+        iv_speed INTEGER NOT NULL,
+        iv_special_attack INTEGER NOT NULL,
+        iv_special_defence INTEGER NOT NULL,
+        level INTEGER NOT NULL,
+        nature TEXT NOT NULL,
+        ability TEXT NOT NULL,
+        held_item TEXT,
+        gender TEXT,
+        hidden_power_type TEXT NOT NULL,
+        data BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS encounters_species_id ON encounters (species_id);
+    CREATE INDEX IF NOT EXISTS encounters_species_id_iv_sum ON encounters (species_id, iv_sum);
+    CREATE INDEX IF NOT EXISTS encounters_shiny_value ON encounters (shiny_value);
+    CREATE INDEX IF NOT EXISTS encounters_iv_sum ON encounters (iv_sum);
+    CREATE INDEX IF NOT EXISTS encounters_encounter_time ON encounters (encounter_time);
+"""
+
+_insert_query = """
+    INSERT INTO encounters (
+        encounter_time, phase, species_id, personality_value, shiny_value,
+        iv_sum, iv_hp, iv_attack, iv_defence, iv_speed, iv_special_attack, iv_special_defence,
+        level, nature, ability, held_item, gender, hidden_power_type, data
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_select_columns = """
+    id, encounter_time, phase, species_id, personality_value, shiny_value,
+    iv_sum, iv_hp, iv_attack, iv_defence, iv_speed, iv_special_attack, iv_special_defence,
+    level, nature, ability, held_item, gender, hidden_power_type
+"""
+
+
+class EncounterDatabase:
+    """
+    Stores every encounter in an SQLite database (`stats/encounters.db`), so that they can be searched
+    later on without having to go through all the per-phase CSV files.
+
+    Inserts are buffered and only committed every `commit_batch_size` encounters or every
+    `commit_interval` seconds, whichever comes first. A background thread takes care of the
+    latter, so encounters do not linger in the buffer if the bot stops encountering things for
+    a while. Queries only see committed encounters.
+
+    The database uses WAL mode, so queries (which use a separate connection for each thread) never
+    block the bot from writing new encounters.
+    """
+
+    commit_batch_size: int = 250
+    commit_interval: int = 10
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._read_connections = threading.local()
+        self._pending_rows: list[tuple] = []
+        self._last_commit: float = time.time()
+        self._closed: bool = False
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.executescript(_schema)
+
+        threading.Thread(target=self._commit_periodically, name="EncounterDatabaseCommit", daemon=True).start()
+
+    def add_encounter(self, pokemon: Pokemon, phase: int) -> None:
+        """
+        :param pokemon: The encountered Pokémon
+        :param phase: Number of the current phase (i.e. number of shinies that have been encountered before)
+        """
+        ivs = pokemon.ivs
+        row = (
+            time.time(),
+            phase,
+            pokemon.species.index,
+            pokemon.personality_value,
+            pokemon.shiny_value,
+            ivs.sum(),
+            ivs.hp,
+            ivs.attack,
+            ivs.defence,
+            ivs.speed,
+            ivs.special_attack,
+            ivs.special_defence,
+            pokemon.level,
+            pokemon.nature.name,
+            pokemon.ability.name,
+            pokemon.held_item.name if pokemon.held_item else None,
+            pokemon.gender,
+            pokemon.hidden_power_type.name,
+            pokemon.data,
+        )
+
+        with self._write_lock:
+            self._pending_rows.append(row)
+            if (
+                len(self._pending_rows) >= self.commit_batch_size
+                or pokemon.is_shiny
+                or time.time() - self._last_commit >= self.commit_interval
+            ):
+                self._commit()
+
+    def commit(self) -> None:
+        """
+        Writes all buffered encounters to the database.
+        """
+        with self._write_lock:
+            self._commit()
+
+    def _commit_periodically(self) -> None:
+        """
+        Runs in a background thread and commits buffered encounters once they are older than `commit_interval`.
+        """
+        while True:
+            time.sleep(max(1.0, self._last_commit + self.commit_interval - time.time()))
+            with self._write_lock:
+                if self._closed:
+                    return
+                if time.time() - self._last_commit >= self.commit_interval and len(self._pending_rows) > 0:
+                    self._commit()
+
+    def _commit(self) -> None:
+        if len(self._pending_rows) > 0:
+            with self._connection:
+                self._connection.executemany(_insert_query, self._pending_rows)
+            self._pending_rows.clear()
+        self._last_commit = time.time()
+
+    def _get_read_connection(self) -> sqlite3.Connection:
+        connection = getattr(self._read_connections, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            connection.row_factory = sqlite3.Row
+            self._read_connections.connection = connection
+        return connection
+
+    def query(
+        self,
+        species: str | None = None,
+        shiny: bool | None = None,
+        min_iv_sum: int | None = None,
+        max_iv_sum: int | None = None,
+        max_shiny_value: int | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        before_id: int | None = None,
+        limit: int = 100,
+    ) -> list[dict]:
+        """
+        Searches for encounters, newest first.
+
+        This uses keyset pagination rather than `OFFSET` so that fetching later pages does not get slower
+        the further back they are: To get the next page, pass the `id` of the last encounter of the
+        previous page as `before_id`.
+
+        :param species: Only return encounters of this species (by name)
+        :param shiny: Only return shiny (True) or non-shiny (False) encounters
+        :param min_iv_sum: Only return encounters with an IV sum of at least this
+        :param max_iv_sum: Only return encounters with an IV sum of at most this
+        :param max_shiny_value: Only return encounters with a shiny value of at most this
+        :param since: Only return encounters that happened at or after this Unix timestamp
+        :param until: Only return encounters that happened before this Unix timestamp
+        :param before_id: Only return encounters with an ID lower than this
+        :param limit: Maximum number of encounters to return
+        :return: List of encounters, as dicts
+        """
+        connection = self._get_read_connection()
+
+        # Encounters are inserted in chronological order, so a time range is the same as a range of IDs --
+        # and the latter can be searched without needing an extra index lookup per row.
+        lowest_id = 1
+        highest_id = connection.execute("SELECT MAX(id) FROM encounters").fetchone()[0] or 0
+        if before_id is not None:
+            highest_id = min(highest_id, before_id - 1)
+        if since is not None:
+            row = connection.execute(
+                "SELECT id FROM encounters WHERE encounter_time >= ? ORDER BY encounter_time LIMIT 1", (since,)
+            ).fetchone()
+            if row is None:
+                return []
+            lowest_id = max(lowest_id, row[0])
+        if until is not None:
+            row = connection.execute(
+                "SELECT id FROM encounters WHERE encounter_time < ? ORDER BY encounter_time DESC LIMIT 1", (until,)
+            ).fetchone()
+            if row is None:
+                return []
+            highest_id = min(highest_id, row[0])
+        if lowest_id > highest_id:
+            return []
+
+        # SQLite does not know how the IV sum and shiny value are distributed, so it will always search backwards
+        # through all encounters until it has found enough matches. That is fine if most encounters match, but
+        # takes forever if only a handful of them do (such as for shinies.) In those cases, it is a lot faster
+        # to use the IV sum/shiny value index and sort the results afterwards.
+        # Prefixing a column with `+` stops SQLite from using an index for it.
+        matching_fraction = _estimate_matching_fraction(shiny, min_iv_sum, max_iv_sum, max_shiny_value)
+        if matching_fraction**2 < limit / (highest_id - lowest_id + 1):
+            value_column_prefix, id_column_prefix = "", "+"
+        else:
+            value_column_prefix, id_column_prefix = "+", ""
+
+        conditions = [f"{id_column_prefix}id BETWEEN ? AND ?"]
+        parameters = [lowest_id, highest_id]
+        if species is not None:
+            try:
+                species_id = get_species_by_name(species).index
+            except KeyError:
+                return []
+            conditions.append("species_id = ?")
+            parameters.append(species_id)
+        if shiny is not None:
+            conditions.append(f"{value_column_prefix}shiny_value {'<' if shiny else '>='} 8")
+        if max_shiny_value is not None:
+            conditions.append(f"{value_column_prefix}shiny_value <= ?")
+            parameters.append(max_shiny_value)
+        if min_iv_sum is not None:
+            conditions.append(f"{value_column_prefix}iv_sum >= ?")
+            parameters.append(min_iv_sum)
+        if max_iv_sum is not None:
+            conditions.append(f"{value_column_prefix}iv_sum <= ?")
+            parameters.append(max_iv_sum)
+        parameters.append(limit)
+
+        query = (
+            f"SELECT {_select_columns} FROM encounters "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {id_column_prefix}id DESC LIMIT ?"
+        )
+        return [_row_to_dict(row) for row in connection.execute(query, parameters)]
+
+    def iter_encounter_fields(
+        self, chunk_size: int = 250000
+    ) -> Iterator[tuple[numpy.ndarray, dict[str, numpy.ndarray]]]:
+        """
+        Reads all encounters in chunks, in the format that `CatchFilters.matches_batch()` expects.
+
+        :param chunk_size: Maximum number of encounters per chunk
+        :return: Iterator of (encounter IDs, fields) tuples
+        """
+        connection = self._get_read_connection()
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                "SELECT id, species_id, nature, ability, held_item, hidden_power_type, shiny_value, "
+                "iv_hp, iv_attack, iv_defence, iv_speed, iv_special_attack, iv_special_defence "
+                "FROM encounters WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            ).fetchall()
+            if len(rows) == 0:
+                return
+
+            columns = list(zip(*rows))
+            species_ids, species_indices = numpy.unique(numpy.array(columns[1], dtype=numpy.uint16), return_inverse=True)
+            species_names = numpy.array([get_species_by_index(int(index)).name for index in species_ids], dtype=object)
+            ids = numpy.array(columns[0], dtype=numpy.int64)
+            yield ids, {
+                "species": species_names[species_indices],
+                "nature": numpy.array(columns[2], dtype=object),
+                "ability": numpy.array(columns[3], dtype=object),
+                "held_item": numpy.array(columns[4], dtype=object),
+                "hidden_power": numpy.array(columns[5], dtype=object),
+                "shiny_value": numpy.array(columns[6], dtype=numpy.uint16),
+                "hp": numpy.array(columns[7], dtype=numpy.uint8),
+                "attack": numpy.array(columns[8], dtype=numpy.uint8),
+                "defence": numpy.array(columns[9], dtype=numpy.uint8),
+                "speed": numpy.array(columns[10], dtype=numpy.uint8),
+                "special_attack": numpy.array(columns[11], dtype=numpy.uint8),
+                "special_defence": numpy.array(columns[12], dtype=numpy.uint8),
+            }
+            last_id = int(ids[-1])
+
+    def close(self) -> None:
+        with self._write_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._commit()
+            self._connection.execute("PRAGMA optimize")
+            self._connection.close()
+
+
+@cache
+def _get_iv_sum_distribution() -> numpy.ndarray:
+    """
+    :return: Probability of each IV sum (0-186), assuming that every IV is an independent random number
+             between 0 and 31 (which is true for all regular encounters.)
+    """
+    single_iv = numpy.full(32, 1 / 32)
+    distribution = single_iv
+    for _ in range(5):
+        distribution = numpy.convolve(distribution, single_iv)
+    return distribution
+
+
+def _estimate_matching_fraction(
+    shiny: bool | None, min_iv_sum: int | None, max_iv_sum: int | None, max_shiny_value: int | None
+) -> float:
+    """
+    :return: Rough estimate of the fraction of encounters that match the given IV sum and shiny value filters
+    """
+    fraction = 1.0
+    if shiny is True:
+        fraction *= 8 / 65536
+    if max_shiny_value is not None:
+        fraction *= min(max(max_shiny_value + 1, 0), 65536) / 65536
+    if min_iv_sum is not None or max_iv_sum is not None:
+        lower = max(min_iv_sum if min_iv_sum is not None else 0, 0)
+        upper = max(max_iv_sum if max_iv_sum is not None else 186, -1)
+        fraction *= float(_get_iv_sum_distribution()[lower : upper + 1].sum())
+    return fraction
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["id"],
+        "encounter_time": row["encounter_time"],
+        "phase": row["phase"],
+        "species": {"id": row["species_id"], "name": get_species_by_index(row["species_id"]).name},
+        "personality_value": row["personality_value"],
+        "shiny_value": row["shiny_value"],
+        "is_shiny": row["shiny_value"] < 8,
+        "iv_sum": row["iv_sum"],
+        "ivs": {
+            "hp": row["iv_hp"],
+            "attack": row["iv_attack"],
+            "defence": row["iv_defence"],
+            "speed": row["iv_speed"],
+            "special_attack": row["iv_special_attack"],
+            "special_defence": row["iv_special_defence"],
+        },
+        "level": row["level"],
+        "nature": row["nature"],
+        "ability": row["ability"],
+        "held_item": row["held_item"],
+        "gender": row["gender"],
+        "hidden_power_type": row["hidden_power_type"],
+    }
@@ -0,0 +1,121 @@
+import json
+import time
+from collections import deque
+from threading import Condition
+from typing import Any, Iterator
+
+from modules.context import context
+
+
+class _Subscriber:
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self.queue: deque[bytes] = deque()
+        self.overflowed = False
+
+
+class EventStream:
+    """
+    Pushes events (encounters, shinies, game state changes and FPS samples) to any number of clients
+    as Server-Sent Events.
+
+    Every event is encoded exactly once when it is published, and the same bytes are then handed
+    to every subscriber, so the cost of publishing an event does not depend on the number of clients.
+
+    Each subscriber has a buffer of at most `subscriber_buffer_size` events. If a client cannot keep up
+    and its buffer fills up, its connection is closed. Browsers' `EventSource` will then automatically
+    reconnect and send the ID of the last event it has received, and as long as the missed events are
+    still among the last `history_size` events they will be replayed.
+    """
+
+    history_size: int = 500
+    subscriber_buffer_size: int = 100
+    keepalive_interval: int = 15
+    fps_sample_interval: int = 1
+
+    def __init__(self):
+        self._condition = Condition()
+        self._history: deque[tuple[int, bytes]] = deque(maxlen=self.history_size)
+        self._subscribers: set[_Subscriber] = set()
+        self._last_event_id = 0
+        self._last_fps_sample: float = 0
+
+    def publish(self, event_type: str, data: Any) -> None:
+        """
+        :param event_type: Name of the event (`event` field of the SSE message)
+        :param data: JSON-serialisable payload of the event
+        """
+        encoded_data = json.dumps(data)
+        with self._condition:
+            self._last_event_id += 1
+            message = f"id: {self._last_event_id}\nevent: {event_type}\ndata: {encoded_data}\n\n".encode("utf-8")
+            self._history.append((self._last_event_id, message))
+            for subscriber in self._subscribers:
+                if len(subscriber.queue) >= subscriber.buffer_size:
+                    subscriber.overflowed = True
+                else:
+                    subscriber.queue.append(message)
+            self._condition.notify_all()
+
+    def update(self) -> None:
+        """
+        This is called by the main loop after every frame, and publishes events that need to be polled for.
+        """
+        if len(self._subscribers) == 0:
+            return
+
+        from modules.memory import get_game_state
+
+        # Game state listeners are called from within `get_game_state()`.
+        get_game_state()
+
+        if time.time() - self._last_fps_sample >= self.fps_sample_interval:
+            self._last_fps_sample = time.time()
+            self.publish(
+                "fps",
+                {
+                    "frame_count": context.emulator.get_frame_count(),
+                    "current_fps": context.emulator.get_current_fps(),
+                    "current_time_spent_in_bot_fraction": context.emulator.get_current_time_spent_in_bot_fraction(),
+                },
+            )
+
+    def subscribe(self, last_event_id: int | None = None) -> Iterator[bytes]:
+        """
+        :param last_event_id: ID of the last event the client has received (from the `Last-Event-ID` header),
+                              all events after that one will be sent first if they are still available.
+        :return: An iterator over the encoded SSE messages for this client
+        """
+        # The subscriber is only registered once the response actually starts streaming, so that it does not
+        # stay registered forever if the generator is never iterated.
+        subscriber = _Subscriber(self.subscriber_buffer_size)
+        with self._condition:
+            if last_event_id is not None:
+                missed_events = [message for event_id, message in self._history if event_id > last_event_id]
+                subscriber.queue.extend(missed_events[-self.subscriber_buffer_size :])
+            self._subscribers.add(subscriber)
+
+        try:
+            # Tells `EventSource` to wait 1 second before reconnecting.
+            yield b"retry: 1000\n\n"
+            while True:
+                with self._condition:
+                    if len(subscriber.queue) == 0 and not subscriber.overflowed:
+                        self._condition.wait(self.keepalive_interval)
+                    messages = list(subscriber.queue)
+                    subscriber.queue.clear()
+                    overflowed = subscriber.overflowed
+
+                if len(messages) > 0:
+                    yield b"".join(messages)
+                elif overflowed:
+                    return
+                else:
+                    # Comment line, which makes sure that disconnected clients are noticed eventually.
+                    yield b": keepalive\n\n"
+        finally:
+            with self._condition:
+                self._subscribers.discard(subscriber)
+
+
+event_stream = EventStream()
@@ -1,7 +1,11 @@
+import atexit
 import json
 import os
+import struct
 from pathlib import Path
 
+import numpy
+
 from modules.context import context
 from modules.pokemon import Pokemon
 
@@ -72,20 +76,91 @@ def save_pk3(pokemon: Pokemon) -> None:
         binary_file.write(pokemon.data)
 
 
-def get_rng_state_history(name: str) -> list:
-    default = []
-    try:
-        file = read_file(context.profile.path / "rng" / f"{name}.json")
-        data = json.loads(file) if file else default
-        return data
-    except SystemExit:
-        raise
-    except:
-        return default
+class RngStateHistory:
+    """
+    Keeps track of the RNG states (`gRngValue`) that have already been used for an attempt, so that
+    soft-reset modes don't end up generating the same Pokémon over and over again.
 
+    The history is stored in `profiles/<profile>/rng/<name>.bin` as a list of little-endian uint32
+    values, and new values are just appended to that file -- so adding a value costs a 4-byte write
+    no matter how long the history already is. Lookups use an in-memory set.
+    """
 
-def save_rng_state_history(name: str, data: list) -> bool:
-    if write_file(context.profile.path / "rng" / f"{name}.json", json.dumps(data)):
-        return True
-    else:
-        return False
+    def __init__(self, file: Path):
+        self._file = file
+        self._values: set[int] = set()
+
+        if self._file.is_file():
+            data = self._file.read_bytes()
+            # The last value might only have been partially written if the bot crashed at the wrong time.
+            data = data[: len(data) - len(data) % 4]
+            self._values = set(numpy.frombuffer(data, dtype="<u4").tolist())
+        else:
+            self._file.parent.mkdir(parents=True, exist_ok=True)
+
+        self._file_handle = open(self._file, "ab", buffering=0)
+        if self._file_handle.tell() % 4 != 0:
+            self._file_handle.truncate(self._file_handle.tell() - self._file_handle.tell() % 4)
+
+    def __contains__(self, rng_value: int) -> bool:
+        return rng_value in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def add(self, rng_value: int) -> None:
+        if rng_value not in self._values:
+            self._values.add(rng_value)
+            self._file_handle.write(struct.pack("<I", rng_value))
+
+    def update(self, rng_values: list[int]) -> None:
+        new_values = [rng_value for rng_value in set(rng_values) if rng_value not in self._values]
+        if new_values:
+            self._values.update(new_values)
+            self._file_handle.write(numpy.array(new_values, dtype="<u4").tobytes())
+
+    def close(self) -> None:
+        self._file_handle.close()
+
+
+_rng_state_histories: dict[Path, RngStateHistory] = {}
+
+
+def _close_rng_state_histories() -> None:
+    for history in _rng_state_histories.values():
+        history.close()
+    _rng_state_histories.clear()
+
+
+atexit.register(_close_rng_state_histories)
+
+
+def get_rng_state_history(name: str) -> RngStateHistory:
+    """
+    The history is only read from disk the first time it is requested, after that the same instance
+    is returned for the rest of the session.
+
+    :param name: Name of the history (e.g. the starter's species name)
+    :return: RNG state history of the current profile
+    """
+    rng_directory = context.profile.path / "rng"
+    history_file = rng_directory / f"{name}.bin"
+    if history_file in _rng_state_histories:
+        return _rng_state_histories[history_file]
+
+    history = RngStateHistory(history_file)
+    _rng_state_histories[history_file] = history
+
+    # Previous versions of the bot stored the history as a JSON list.
+    legacy_file = rng_directory / f"{name}.json"
+    if legacy_file.is_file():
+        try:
+            history.update(json.loads(read_file(legacy_file)))
+            legacy_file.rename(rng_directory / f"{name}.json.old")
+        except (ValueError, TypeError, OSError):
+            pass
+
+    return history
@@ -0,0 +1,161 @@
+import io
+import time
+from threading import Condition, Thread
+from typing import Iterator, Literal
+
+import PIL.Image
+
+from modules.context import context
+
+ImageFormat = Literal["jpeg", "png"]
+
+
+class FrameStream:
+    """
+    Streams the emulator's screen to any number of HTTP clients (as `multipart/x-mixed-replace`, which
+    browsers and OBS display like a video.)
+
+    The main thread only copies the raw frame buffer into one of two pre-allocated buffers, which takes
+    a couple of microseconds. Encoding the image happens on a separate thread, and every frame is only
+    encoded once per format no matter how many clients are connected.
+
+    If the encoder is still busy with a frame when the next one is due, that next frame is skipped
+    rather than making the main thread wait. Clients always receive the most recent encoded frame, so
+    a slow client simply gets fewer frames without holding up anyone else.
+    """
+
+    frames_per_second: int = 30
+    jpeg_quality: int = 90
+    # A frame is re-sent after this many seconds if there is no new one (e.g. because video is disabled),
+    # so that disconnected clients are noticed eventually.
+    resend_interval: int = 5
+
+    def __init__(self):
+        self._condition = Condition()
+        self._subscribers: dict[ImageFormat, int] = {"jpeg": 0, "png": 0}
+        self._encoder: Thread | None = None
+        self._buffers: list[bytearray] = []
+        self._dimensions: tuple[int, int] = (0, 0)
+        self._back_buffer: int = 0
+        self._ready_buffer: int | None = None
+        self._encoding_buffer: int | None = None
+        self._last_capture_time: float = 0
+
+        self._frame_number: int = 0
+        self._frames: dict[ImageFormat, bytes] = {}
+        self._captured: int = 0
+        self._skipped: int = 0
+
+    def update(self) -> None:
+        """
+        This is called by the main loop after every frame, and grabs the current screen if the
+        next frame is due.
+        """
+        if self._subscribers["jpeg"] == 0 and self._subscribers["png"] == 0:
+            return
+        if time.time() - self._last_capture_time < 1 / self.frames_per_second:
+            return
+        # With video disabled, mGBA does not render anything and the frame buffer would not change.
+        if not context.emulator.get_video_enabled():
+            return
+
+        self._last_capture_time = time.time()
+        with self._condition:
+            if len(self._buffers) == 0:
+                width, height = context.emulator.get_image_dimensions()
+                self._dimensions = (width, height)
+                self._buffers = [bytearray(width * height * 4), bytearray(width * height * 4)]
+            if self._encoding_buffer == self._back_buffer:
+                self._skipped += 1
+                return
+            buffer_index = self._back_buffer
+
+        # The encoder never touches the back buffer, so this can happen without holding the lock.
+        context.emulator.copy_current_screen(self._buffers[buffer_index])
+
+        with self._condition:
+            if self._ready_buffer is not None:
+                # The previous frame has not even been picked up by the encoder yet.
+                self._skipped += 1
+            self._ready_buffer = buffer_index
+            self._back_buffer = 1 - buffer_index
+            self._captured += 1
+            self._condition.notify_all()
+
+    def _run_encoder(self) -> None:
+        while True:
+            with self._condition:
+                while self._ready_buffer is None:
+                    self._condition.wait()
+                buffer_index = self._ready_buffer
+                self._ready_buffer = None
+                self._encoding_buffer = buffer_index
+                formats = [image_format for image_format, count in self._subscribers.items() if count > 0]
+
+            image = PIL.Image.frombuffer("RGBX", self._dimensions, self._buffers[buffer_index], "raw", "RGBX", 0, 1)
+            frames = {}
+            for image_format in formats:
+                frames[image_format] = self._encode(image, image_format)
+
+            with self._condition:
+                self._encoding_buffer = None
+                self._frame_number += 1
+                self._frames = frames
+                self._condition.notify_all()
+
+    def _encode(self, image: PIL.Image.Image, image_format: ImageFormat) -> bytes:
+        output = io.BytesIO()
+        if image_format == "png":
+            image.convert("RGB").save(output, format="PNG", compress_level=1)
+        else:
+            image.save(output, format="JPEG", quality=self.jpeg_quality)
+        return output.getvalue()
+
+    def subscribe(self, image_format: ImageFormat = "jpeg", boundary: str = "frame") -> Iterator[bytes]:
+        """
+        :param image_format: Format that the frames should be encoded in
+        :param boundary: Boundary string of the multipart response
+        :return: An iterator over the parts of a `multipart/x-mixed-replace` response for this client
+        """
+        content_type = f"image/{image_format}"
+        with self._condition:
+            self._subscribers[image_format] += 1
+            if self._encoder is None:
+                self._encoder = Thread(target=self._run_encoder, name="FrameStreamEncoder", daemon=True)
+                self._encoder.start()
+
+        try:
+            last_frame_number = 0
+            while True:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self._frame_number > last_frame_number and image_format in self._frames,
+                        self.resend_interval,
+                    )
+                    last_frame_number = self._frame_number
+                    frame = self._frames.get(image_format)
+
+                if frame is not None:
+                    yield (
+                        f"--{boundary}\r\nContent-Type: {content_type}\r\nContent-Length: {len(frame)}\r\n\r\n".encode(
+                            "ascii"
+                        )
+                        + frame
+                        + b"\r\n"
+                    )
+        finally:
+            with self._condition:
+                self._subscribers[image_format] -= 1
+
+    def get_metrics(self) -> dict:
+        with self._condition:
+            return {
+                "clients": dict(self._subscribers),
+                "frames_per_second": self.frames_per_second,
+                "captured_frames": self._captured,
+                "skipped_frames": self._skipped,
+                "encoded_frames": self._frame_number,
+            }
+
+
+frame_stream = FrameStream()
@@ -1,22 +1,183 @@
+import hashlib
 import json
-from typing import Literal
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterator, Literal, NamedTuple
+
+import numpy
 
 from modules.roms import ROM, ROMLanguage
 from modules.runtime import get_data_path
 
-_symbols: dict[str, tuple[int, int]] = {}
-_reverse_symbols: dict[int, tuple[str, str, int]] = {}
+_symbol_table: "SymbolTable | None" = None
+_symbol_lookup_cache: dict[str, tuple[int, int]] = {}
+_reverse_symbol_lookup_cache: dict[int, tuple[str, str, int]] = {}
 _event_flags: dict[str, tuple[int, int]] = {}
+_event_flag_table: "EventFlagTable | None" = None
 _character_table_international: list[str] = []
 _character_table_japanese: list[str] = []
 _current_character_table: list[str] = []
 
+# Parsing the text-based symbol tables takes a couple hundred milliseconds, so they are compiled into
+# a binary format the first time they are used and stored in this directory. The cache files contain a
+# hash of their source files, so they are recompiled automatically whenever a symbol table changes.
+# Bump this number whenever the binary format changes.
+_CACHE_FORMAT_VERSION = 1
+_SYMBOL_CACHE_MAGIC = b"PBSYMTAB"
+_SYMBOL_CACHE_HEADER = struct.Struct("<8s20sIII")
+_EVENT_FLAGS_CACHE_MAGIC = b"PBFLAGS_"
+_EVENT_FLAGS_CACHE_HEADER = struct.Struct("<8s20sII")
 
-def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
-    global _symbols, _reverse_symbols
 
-    _symbols.clear()
-    _reverse_symbols.clear()
+class SymbolTable:
+    """
+    Read-only view of a compiled symbol table.
+
+    The compiled table consists of two sorted lists of symbols -- one ordered by (upper case) name,
+    and one ordered by address -- and a blob of all the symbol names. Looking up a symbol is a binary
+    search in one of these lists. Nothing is parsed or copied when the table is opened, which is why
+    opening a memory-mapped cache file is almost instant.
+
+    Lookups are not cached in here, see `get_symbol()` and `get_symbol_name()` for that.
+    """
+
+    def __init__(self, data: bytes | mmap.mmap):
+        self._data = data
+        self._view = memoryview(data)
+
+        magic, self.source_hash, entry_count, reverse_entry_count, names_size = _SYMBOL_CACHE_HEADER.unpack_from(
+            self._view
+        )
+        if magic != _SYMBOL_CACHE_MAGIC:
+            raise RuntimeError("Invalid symbol table cache file.")
+
+        self._arrays: list[memoryview] = []
+        cursor = _SYMBOL_CACHE_HEADER.size
+
+        def next_array(length: int) -> memoryview:
+            nonlocal cursor
+            array = self._view[cursor : cursor + length * 4].cast("I")
+            self._arrays.append(array)
+            cursor += length * 4
+            return array
+
+        self._addresses = next_array(entry_count)
+        self._lengths = next_array(entry_count)
+        self._name_offsets = next_array(entry_count)
+        self._name_lengths = next_array(entry_count)
+        self._reverse_addresses = next_array(reverse_entry_count)
+        self._reverse_lengths = next_array(reverse_entry_count)
+        self._reverse_name_offsets = next_array(reverse_entry_count)
+        self._reverse_name_lengths = next_array(reverse_entry_count)
+        self._names = self._view[cursor : cursor + names_size]
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    def __iter__(self) -> Iterator[tuple[str, int, int]]:
+        """
+        :return: Name, address and length of all symbols, ordered by name
+        """
+        for index in range(len(self._addresses)):
+            yield self._get_name(self._name_offsets[index], self._name_lengths[index]), self._addresses[
+                index
+            ], self._lengths[index]
+
+    def _get_name(self, offset: int, length: int) -> str:
+        return str(self._names[offset : offset + length], "utf-8")
+
+    def _get_canonical_name(self, index: int) -> str:
+        return self._get_name(self._name_offsets[index], self._name_lengths[index]).upper()
+
+    def find(self, canonical_name: str) -> tuple[int, int] | None:
+        """
+        :param canonical_name: Upper-case name of the symbol
+        :return: Address and length of the symbol, or None if there is no such symbol
+        """
+        index = bisect_left(range(len(self._addresses)), canonical_name, key=self._get_canonical_name)
+        if index < len(self._addresses) and self._get_canonical_name(index) == canonical_name:
+            return self._addresses[index], self._lengths[index]
+        return None
+
+    def find_by_address(self, address: int) -> tuple[str, str, int] | None:
+        """
+        :param address: Address of the symbol
+        :return: Upper-case name, original name and length of the symbol starting at that address,
+                 or None if there is no such symbol
+        """
+        index = bisect_left(self._reverse_addresses, address)
+        if index < len(self._reverse_addresses) and self._reverse_addresses[index] == address:
+            name = self._get_name(self._reverse_name_offsets[index], self._reverse_name_lengths[index])
+            return name.upper(), name, self._reverse_lengths[index]
+        return None
+
+    def close(self) -> None:
+        for array in self._arrays:
+            array.release()
+        self._names.release()
+        self._view.release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+def _get_cache_directory() -> Path:
+    return get_data_path() / "symbols" / "cache"
+
+
+def _hash_sources(files: list[Path], extra: str = "") -> bytes:
+    sha1 = hashlib.sha1(f"{_CACHE_FORMAT_VERSION}:{extra}".encode("utf-8"))
+    for file in files:
+        if file.is_file():
+            sha1.update(file.read_bytes())
+        sha1.update(b"\0")
+    return sha1.digest()
+
+
+def _read_cache_file(cache_file: Path, header: struct.Struct, magic: bytes, source_hash: bytes) -> mmap.mmap | None:
+    """
+    :return: A memory map of the cache file if it exists and has been compiled from the current
+             source files, otherwise None
+    """
+    if not cache_file.is_file():
+        return None
+
+    with open(cache_file, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+    if len(data) < header.size or header.unpack_from(data)[0:2] != (magic, source_hash):
+        data.close()
+        return None
+
+    return data
+
+
+def _write_cache_file(cache_file: Path, data: bytes) -> None:
+    """
+    Stores a compiled table. Failing to do so (read-only installation, or the file being in use by
+    another bot instance on Windows) is not a problem, the table will just be compiled again next time.
+    """
+    try:
+        cache_file.parent.mkdir(exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as file:
+            file.write(data)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _parse_symbols(
+    symbols_file: str, language: ROMLanguage
+) -> tuple[dict[str, tuple[int, int, str]], dict[int, tuple[str, str, int]]]:
+    symbols: dict[str, tuple[int, int, str]] = {}
+    reverse_symbols: dict[int, tuple[str, str, int]] = {}
+
     for d in [get_data_path() / "symbols", get_data_path() / "symbols" / "patches"]:
         for s in open(d / symbols_file).readlines():
             address, _, length, label = s.split(" ")
@@ -25,9 +186,9 @@ def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
             length = int(length, 16)
             label = label.strip()
 
-            _symbols[label.upper()] = (address, length)
-            if address not in _reverse_symbols or _reverse_symbols[address][2] == 0 and length > 0:
-                _reverse_symbols[address] = (label.upper(), label, length)
+            symbols[label.upper()] = (address, length, label)
+            if address not in reverse_symbols or reverse_symbols[address][2] == 0 and length > 0:
+                reverse_symbols[address] = (label.upper(), label, length)
 
     language_code = str(language)
     language_patch_file = symbols_file.replace(".sym", ".json")
@@ -37,17 +198,90 @@ def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
             language_patches = json.load(file)
         for item in language_patches:
             if language_code in language_patches[item]:
-                _symbols[item.upper()] = (int(language_patches[item][language_code], 16), _symbols[item.upper()][1])
-                _reverse_symbols[int(language_patches[item][language_code], 16)] = (
+                symbols[item.upper()] = (
+                    int(language_patches[item][language_code], 16),
+                    symbols[item.upper()][1],
+                    item,
+                )
+                reverse_symbols[int(language_patches[item][language_code], 16)] = (
                     item.upper(),
                     item,
-                    _symbols[item.upper()][1],
+                    symbols[item.upper()][1],
                 )
 
+    return symbols, reverse_symbols
+
+
+def _compile_symbols(symbols_file: str, language: ROMLanguage, source_hash: bytes) -> bytes:
+    symbols, reverse_symbols = _parse_symbols(symbols_file, language)
+
+    names = bytearray()
+    name_offsets: dict[str, tuple[int, int]] = {}
+
+    def add_name(name: str) -> tuple[int, int]:
+        if name not in name_offsets:
+            encoded_name = name.encode("utf-8")
+            name_offsets[name] = (len(names), len(encoded_name))
+            names.extend(encoded_name)
+        return name_offsets[name]
+
+    entries = [(address, length, *add_name(label)) for _, (address, length, label) in sorted(symbols.items())]
+    reverse_entries = [
+        (address, length, *add_name(label)) for address, (_, label, length) in sorted(reverse_symbols.items())
+    ]
+
+    data = bytearray(
+        _SYMBOL_CACHE_HEADER.pack(_SYMBOL_CACHE_MAGIC, source_hash, len(entries), len(reverse_entries), len(names))
+    )
+    for table in [entries, reverse_entries]:
+        for column in zip(*table):
+            data.extend(struct.pack(f"<{len(column)}I", *column))
+    data.extend(names)
+
+    return bytes(data)
+
+
+def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
+    global _symbol_table
+
+    if _symbol_table is not None:
+        _symbol_table.close()
+        _symbol_table = None
+    _symbol_lookup_cache.clear()
+    _reverse_symbol_lookup_cache.clear()
 
-def _load_event_flags(flags_file: str) -> None:  # TODO Japanese ROMs not working
-    global _event_flags
+    language_code = str(language)
+    source_files = [
+        get_data_path() / "symbols" / symbols_file,
+        get_data_path() / "symbols" / "patches" / symbols_file,
+        get_data_path() / "symbols" / "patches" / "language" / symbols_file.replace(".sym", ".json"),
+    ]
+    source_hash = _hash_sources(source_files, language_code)
+    cache_file = _get_cache_directory() / symbols_file.replace(".sym", f"_{language_code}.bin")
+
+    data = _read_cache_file(cache_file, _SYMBOL_CACHE_HEADER, _SYMBOL_CACHE_MAGIC, source_hash)
+    if data is None:
+        data = _compile_symbols(symbols_file, language, source_hash)
+        _write_cache_file(cache_file, data)
+
+    _symbol_table = SymbolTable(data)
+
+
+class EventFlagTable(NamedTuple):
+    """
+    Describes where all event flags are located, so that they can be read in one go (see `get_event_flags()`.)
+    """
+
+    # Names of all event flags, in the same order as `bit_indices`.
+    names: list[str]
+    # Index of each flag's bit, counting from the first bit of the flag region (least significant bit first.)
+    bit_indices: numpy.ndarray
+    # Offset of the flag region from the start of save block 1, and its length in bytes.
+    offset: int
+    size: int
 
+
+def _parse_event_flags(flags_file: str) -> dict[str, tuple[int, int]]:  # TODO Japanese ROMs not working
     match flags_file:
         case "flags_gen3rs.txt":
             sav1_offset = 0x1220
@@ -58,7 +292,7 @@ def _load_event_flags(flags_file: str) -> None:  # TODO Japanese ROMs not workin
         case _:
             raise RuntimeError("Invalid argument to _load_event_flags()")
 
-    _event_flags.clear()
+    event_flags = {}
     for s in open(get_data_path() / "event_flags" / flags_file).readlines():
         col = s.split("\t")
 
@@ -68,11 +302,55 @@ def _load_event_flags(flags_file: str) -> None:  # TODO Japanese ROMs not workin
 
         if col[4] or col[6]:
             if col[4]:
-                _event_flags[col[4].replace("\n", "")] = ((int(col[0], 16) // 8) + sav1_offset, int(col[0], 16) % 8)
+                event_flags[col[4].replace("\n", "")] = ((int(col[0], 16) // 8) + sav1_offset, int(col[0], 16) % 8)
             else:
-                _event_flags[col[6].replace("\n", "")] = ((int(col[0], 16) // 8) + sav1_offset, int(col[0], 16) % 8)
+                event_flags[col[6].replace("\n", "")] = ((int(col[0], 16) // 8) + sav1_offset, int(col[0], 16) % 8)
+
+    return dict(sorted(event_flags.items()))
+
+
+def _compile_event_flags(flags_file: str, source_hash: bytes) -> bytes:
+    event_flags = _parse_event_flags(flags_file)
+    names = "\n".join(event_flags.keys()).encode("utf-8")
+
+    data = bytearray(_EVENT_FLAGS_CACHE_HEADER.pack(_EVENT_FLAGS_CACHE_MAGIC, source_hash, len(event_flags), len(names)))
+    data.extend(struct.pack(f"<{len(event_flags)}I", *(offset for offset, _ in event_flags.values())))
+    data.extend(struct.pack(f"<{len(event_flags)}B", *(bit for _, bit in event_flags.values())))
+    data.extend(names)
+
+    return bytes(data)
+
 
-    _event_flags = dict(sorted(_event_flags.items()))
+def _load_event_flags(flags_file: str) -> None:
+    source_hash = _hash_sources([get_data_path() / "event_flags" / flags_file])
+    cache_file = _get_cache_directory() / flags_file.replace(".txt", ".bin")
+
+    data = _read_cache_file(cache_file, _EVENT_FLAGS_CACHE_HEADER, _EVENT_FLAGS_CACHE_MAGIC, source_hash)
+    if data is None:
+        data = _compile_event_flags(flags_file, source_hash)
+        _write_cache_file(cache_file, data)
+
+    _, _, count, names_size = _EVENT_FLAGS_CACHE_HEADER.unpack_from(data)
+    cursor = _EVENT_FLAGS_CACHE_HEADER.size
+    offsets = struct.unpack_from(f"<{count}I", data, cursor)
+    bits = struct.unpack_from(f"<{count}B", data, cursor + count * 4)
+    names = str(data[cursor + count * 5 : cursor + count * 5 + names_size], "utf-8").split("\n")
+    if isinstance(data, mmap.mmap):
+        data.close()
+
+    # This dict is imported by other modules, so it must be updated in place.
+    _event_flags.clear()
+    _event_flags.update(zip(names, zip(offsets, bits)))
+
+    global _event_flag_table
+    byte_offsets = numpy.array(offsets, dtype=numpy.int64)
+    region_offset = int(byte_offsets.min())
+    _event_flag_table = EventFlagTable(
+        names=names,
+        bit_indices=(byte_offsets - region_offset) * 8 + numpy.array(bits, dtype=numpy.int64),
+        offset=region_offset,
+        size=int(byte_offsets.max()) - region_offset + 1,
+    )
 
 
 def _prepare_character_tables() -> None:
@@ -135,7 +413,7 @@ def _prepare_character_tables() -> None:
 
 
 def set_rom(rom: ROM) -> None:
-    global _symbols, _current_character_table
+    global _current_character_table
 
     match rom.game_code:
         case "AXV":
@@ -184,13 +462,27 @@ def set_rom(rom: ROM) -> None:
     else:
         _current_character_table = _character_table_international
 
+    from modules.memory import resolve_symbol_handles
+
+    resolve_symbol_handles()
+
 
 def get_symbol(symbol_name: str) -> tuple[int, int]:
-    canonical_name = symbol_name.strip().upper()
-    if canonical_name not in _symbols:
-        raise RuntimeError(f"Unknown symbol: {symbol_name}!")
+    result = _symbol_lookup_cache.get(symbol_name)
+    if result is None:
+        result = _symbol_table.find(symbol_name.strip().upper())
+        if result is None:
+            raise RuntimeError(f"Unknown symbol: {symbol_name}!")
+        _symbol_lookup_cache[symbol_name] = result
 
-    return _symbols[canonical_name]
+    return result
+
+
+def get_symbols() -> Iterator[tuple[str, int, int]]:
+    """
+    :return: Name, address and length of every symbol of the current game
+    """
+    return iter(_symbol_table)
 
 
 def get_symbol_name(address: int, pretty_name: bool = False) -> str:
@@ -201,7 +493,12 @@ def get_symbol_name(address: int, pretty_name: bool = False) -> str:
 
     :return: name of the symbol (str)
     """
-    return _reverse_symbols.get(address, ("", ""))[0 if not pretty_name else 1]
+    result = _reverse_symbol_lookup_cache.get(address)
+    if result is None:
+        result = _symbol_table.find_by_address(address) or ("", "", 0)
+        _reverse_symbol_lookup_cache[address] = result
+
+    return result[0 if not pretty_name else 1]
 
 
 def get_event_flag_offset(flag_name: str) -> int:
@@ -211,6 +508,13 @@ def get_event_flag_offset(flag_name: str) -> int:
     return _event_flags[flag_name]
 
 
+def get_event_flag_table() -> EventFlagTable:
+    if _event_flag_table is None:
+        raise RuntimeError("Event flags have not been loaded yet.")
+
+    return _event_flag_table
+
+
 def decode_string(
     encoded_string: bytes,
     replace_newline: bool = True,
@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING, Union
 
 from modules.context import context
 from modules.daycare import get_daycare_data
-from modules.game import decode_string, _symbols, _reverse_symbols
+from modules.game import decode_string, get_symbol_name, get_symbols
 from modules.gui.emulator_controls import DebugTab
 from modules.items import get_items
 from modules.memory import (
@@ -343,9 +343,8 @@ class SymbolsTab(DebugTab):
 
         items: dict[str, str] = {}
         detached_items = set()
-        for symbol,values in _symbols.items():
-            address, length = values
-            _,symbol,_ = _reverse_symbols[address]
+        for _, address, length in get_symbols():
+            symbol = get_symbol_name(address, pretty_name=True)
             if length == 0:
                 continue
             if not (symbol.startswith("s") or symbol.startswith("l") or symbol.startswith("g")):
@@ -549,15 +548,41 @@ class EventFlagsTab(DebugTab):
         self._tv.update_data(self._get_data())
 
     def _get_data(self):
-        from modules.game import _event_flags
-        from modules.memory import get_event_flag
+        from modules.memory import get_event_flags
 
-        result = {}
+        return get_event_flags()
 
-        for flag in _event_flags:
-            result[flag] = get_event_flag(flag)
 
-        return result
+class PerformanceTab(DebugTab):
+    _tv: FancyTreeview
+
+    def draw(self, root: ttk.Notebook):
+        frame = ttk.Frame(root, padding=10)
+        self._tv = FancyTreeview(frame)
+        root.add(frame, text="Performance")
+
+    def update(self, emulator: "LibmgbaEmulator"):
+        self._tv.update_data(self._get_data(emulator))
+
+    def _get_data(self, emulator: "LibmgbaEmulator"):
+        cache_hits, cache_misses = emulator.get_read_cache_stats()
+        cache_reads = cache_hits + cache_misses
+        watch_count, watches_triggered, watch_time = emulator.get_memory_watch_stats()
+
+        return {
+            "Current FPS": emulator.get_current_fps(),
+            "Time Spent in Bot": f"{round(emulator.get_current_time_spent_in_bot_fraction() * 100, 1)}%",
+            "Memory Read Cache": {
+                "__value": f"{cache_hits / cache_reads:.1%} hit rate" if cache_reads > 0 else "n/a",
+                "Hits": f"{cache_hits:,}",
+                "Misses": f"{cache_misses:,}",
+            },
+            "Memory Watches": {
+                "__value": f"{watch_count:,} active",
+                "Triggered in Last Second": f"{watches_triggered:,}",
+                "Time Spent in Last Second": f"{watch_time / 1_000_000:.2f}ms",
+            },
+        }
 
 
 class InputsTab(DebugTab):
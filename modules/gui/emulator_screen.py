@@ -38,6 +38,7 @@ class EmulatorScreen:
             controls.add_tab(SymbolsTab())
             controls.add_tab(EventFlagsTab())
             controls.add_tab(InputsTab())
+            controls.add_tab(PerformanceTab())
         else:
             controls = EmulatorControls(self.window)
         self._controls = controls
@@ -0,0 +1,70 @@
+import time
+from threading import Thread
+from typing import TYPE_CHECKING
+
+from modules.console import console
+from modules.context import context
+from modules.game import set_rom
+from modules.libmgba import LibmgbaEmulator
+
+if TYPE_CHECKING:
+    from pokebot import StartupSettings
+
+
+class PokebotHeadless:
+    """
+    This is an alternative to `PokebotGui` that runs the emulator without ever creating a window.
+
+    Tkinter is never imported in this mode, and the emulator's per-frame callback does nothing, so
+    no time is spent on rendering or processing window events. Video output is disabled as well,
+    which makes libmgba use its dummy renderer.
+
+    Since there is no window that could display the current FPS and encounter rate, those are
+    printed to the console at a regular interval instead.
+    """
+
+    def __init__(self, main_loop: callable, stats_interval: int = 30):
+        self._main_loop = main_loop
+        self._stats_interval = stats_interval
+
+    def run(self, startup_settings: "StartupSettings") -> None:
+        profile = startup_settings.profile
+        if profile is None:
+            console.print("[bold red]Headless mode requires a profile name to be passed as an argument.[/]")
+            return
+
+        context.profile = profile
+        set_rom(profile.rom)
+        context.emulator = LibmgbaEmulator(profile, self._on_frame)
+
+        context.audio = not startup_settings.no_audio
+        context.video = False
+        context.emulation_speed = startup_settings.emulation_speed
+        context.debug = startup_settings.debug
+        context.bot_mode = startup_settings.bot_mode
+
+        console.print(f"Running [cyan]{profile.path.name}[/] in headless mode ([cyan]{context.bot_mode}[/] mode)")
+
+        if self._stats_interval > 0:
+            Thread(target=self._report_stats, daemon=True).start()
+
+        self._main_loop()
+
+    def _on_frame(self) -> None:
+        pass
+
+    def _report_stats(self) -> None:
+        # Importing this creates the `TotalStats` instance, which needs the profile to be loaded first.
+        from modules.stats import total_stats
+
+        while context.emulator is not None:
+            time.sleep(self._stats_interval)
+
+            current_fps = context.emulator.get_current_fps()
+            current_load = context.emulator.get_current_time_spent_in_bot_fraction()
+            console.print(
+                f"[grey50]{current_fps:,}fps ({current_fps / 59.73:0.2f}x) | "
+                f"{total_stats.get_encounter_rate():,}/h | "
+                f"{total_stats.session_encounters:,} encounters this session | "
+                f"{round(current_load * 100, 1)}% bot[/]"
+            )
@@ -0,0 +1,127 @@
+import time
+from collections import deque
+from threading import Condition, Thread
+from typing import Callable, Literal
+
+from modules.console import console
+
+
+class HookExecutor:
+    """
+    Runs a hook function (i.e. `custom_hooks`) on a fixed number of background threads.
+
+    Calls are queued up, but the queue is limited to `queue_size` entries so that a slow hook (such
+    as a Discord webhook that takes a couple of seconds to respond) cannot pile up an endless number
+    of pending calls. What happens if the queue is full depends on `overflow`:
+
+    - `drop`: The new call is discarded.
+    - `coalesce`: The oldest queued call is discarded instead, so that the hook is always called with
+      the most recent data.
+
+    Calls that are submitted with `important=True` (shiny encounters) are never discarded and do not
+    count towards the queue limit.
+    """
+
+    def __init__(
+        self,
+        hook: Callable[[tuple], None],
+        workers: int = 1,
+        queue_size: int = 100,
+        overflow: Literal["drop", "coalesce"] = "coalesce",
+    ):
+        self._hook = hook
+        self._worker_count = workers
+        self._queue_size = queue_size
+        self._overflow = overflow
+        self._queue: deque[tuple[float, tuple, bool]] = deque()
+        self._condition = Condition()
+        self._workers: list[Thread] = []
+        self._busy_workers = 0
+
+        self._submitted = 0
+        self._completed = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._wait_time_history: deque[float] = deque(maxlen=100)
+        self._run_time_history: deque[float] = deque(maxlen=100)
+
+    def submit(self, args: tuple, important: bool = False) -> None:
+        """
+        :param args: Argument that is passed to the hook function
+        :param important: If True, this call will be queued even if the queue is full
+        """
+        with self._condition:
+            self._submitted += 1
+            if not important and sum(1 for entry in self._queue if not entry[2]) >= self._queue_size:
+                if self._overflow == "coalesce":
+                    for entry in self._queue:
+                        if not entry[2]:
+                            self._queue.remove(entry)
+                            self._coalesced += 1
+                            break
+                else:
+                    self._dropped += 1
+                    return
+
+            self._queue.append((time.perf_counter(), args, important))
+            if len(self._workers) < self._worker_count:
+                worker = Thread(target=self._run_worker, name=f"HookExecutor-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+
+    def _run_worker(self) -> None:
+        while True:
+            with self._condition:
+                while len(self._queue) == 0:
+                    self._condition.wait()
+                queued_at, args, _ = self._queue.popleft()
+                self._busy_workers += 1
+
+            started_at = time.perf_counter()
+            try:
+                self._hook(args)
+                failed = False
+            except Exception:
+                console.print_exception(show_locals=True)
+                failed = True
+            finished_at = time.perf_counter()
+
+            with self._condition:
+                self._busy_workers -= 1
+                self._completed += 1
+                if failed:
+                    self._failed += 1
+                self._wait_time_history.append(started_at - queued_at)
+                self._run_time_history.append(finished_at - started_at)
+                self._condition.notify_all()
+
+    def wait_until_idle(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until all queued calls have been processed.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely
+        :return: Whether all queued calls have been processed
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self._queue) == 0 and self._busy_workers == 0, timeout)
+
+    def get_metrics(self) -> dict:
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "busy_workers": self._busy_workers,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "coalesced": self._coalesced,
+                "average_wait_time": _average(self._wait_time_history),
+                "average_run_time": _average(self._run_time_history),
+                "max_run_time": max(self._run_time_history, default=0.0),
+            }
+
+
+def _average(values: deque[float]) -> float:
+    return sum(values) / len(values) if len(values) > 0 else 0.0
@@ -1,5 +1,5 @@
 from flask_cors import CORS
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
 from modules.config import config
 from modules.context import context
@@ -7,30 +7,61 @@ from modules.items import get_items
 from modules.pokemon import get_party
 from modules.stats import total_stats
 from modules.game import _event_flags
-from modules.memory import get_event_flag, get_game_state
+from modules.event_stream import event_stream
+from modules.frame_stream import frame_stream
+from modules.memory import add_game_state_listener, get_event_flags, get_game_state
+from modules.state_snapshot import state_publisher
 from modules.trainer import trainer
 
 
+def _get_trainer_data() -> dict:
+    data = trainer.to_dict()
+    data["game_state"] = get_game_state().name
+    return data
+
+
+def _published_response(name: str) -> Response:
+    """
+    Serves a resource that has been published by the main thread (see `StatePublisher`), which means that
+    requests never read from the emulator themselves. Supports `If-None-Match` via the resource's ETag.
+    """
+    resource = state_publisher.get(name)
+    if resource is None:
+        return jsonify(None)
+
+    response = Response(resource.json, mimetype="application/json")
+    response.set_etag(resource.etag)
+    return response.make_conditional(request)
+
+
 def http_server() -> None:
     """
     Run Flask server to make bot data available via HTTP requests.
     """
+    state_publisher.add_source("trainer", _get_trainer_data)
+    state_publisher.add_source("items", get_items)
+    state_publisher.add_source("party", lambda: [p.to_dict() for p in get_party()])
+    state_publisher.add_source("event_flags", get_event_flags)
+    add_game_state_listener(
+        lambda previous, new: event_stream.publish("game_state", {"previous": previous.name, "new": new.name})
+    )
+
+    frame_stream.frames_per_second = config["obs"]["http_server"].get("video_fps", 30)
+
     server = Flask(__name__)
     CORS(server)
 
     @server.route("/trainer", methods=["GET"])
     def http_get_trainer():
-        data = trainer.to_dict()
-        data["game_state"] = get_game_state().name
-        return jsonify(data)
+        return _published_response("trainer")
 
     @server.route("/items", methods=["GET"])
     def http_get_bag():
-        return jsonify(get_items())
+        return _published_response("items")
 
     @server.route("/party", methods=["GET"])
     def http_get_party():
-        return jsonify([p.to_dict() for p in get_party()])
+        return _published_response("party")
 
     @server.route("/encounter_log", methods=["GET"])
     def http_get_encounter_log():
@@ -38,7 +69,69 @@ def http_server() -> None:
 
     @server.route("/shiny_log", methods=["GET"])
     def http_get_shiny_log():
-        return jsonify(total_stats.get_shiny_log())
+        shiny_log = total_stats.shiny_log
+        start = request.args.get("offset", 0, type=int)
+        since = request.args.get("since", type=float)
+        if since is not None:
+            start += shiny_log.get_index_since(since)
+        limit = request.args.get("limit", type=int)
+        stop = start + limit if limit is not None else None
+
+        # Entries are stored as JSON already, so they can be sent as they are instead of being decoded
+        # and encoded again.
+        def generate():
+            yield b"["
+            for index, entry in enumerate(shiny_log.read_raw(start, stop)):
+                yield b"," + entry if index > 0 else entry
+            yield b"]"
+
+        return Response(generate(), mimetype="application/json")
+
+    @server.route("/encounters", methods=["GET"])
+    def http_get_encounters():
+        shiny = request.args.get("shiny")
+        limit = max(1, min(request.args.get("limit", 100, type=int), 1000))
+        encounters = total_stats.encounter_database.query(
+            species=request.args.get("species"),
+            shiny=None if shiny is None else shiny.lower() in ("1", "true", "yes"),
+            min_iv_sum=request.args.get("min_iv_sum", type=int),
+            max_iv_sum=request.args.get("max_iv_sum", type=int),
+            max_shiny_value=request.args.get("max_shiny_value", type=int),
+            since=request.args.get("since", type=float),
+            until=request.args.get("until", type=float),
+            before_id=request.args.get("before_id", type=int),
+            limit=limit,
+        )
+        return jsonify(
+            {
+                "encounters": encounters,
+                "next_before_id": encounters[-1]["id"] if len(encounters) == limit else None,
+            }
+        )
+
+    @server.route("/stream", methods=["GET"])
+    def http_get_stream():
+        last_event_id = request.headers.get("Last-Event-ID", request.args.get("last_event_id"))
+        return Response(
+            event_stream.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @server.route("/video", methods=["GET"])
+    def http_get_video():
+        image_format = request.args.get("format", "jpeg")
+        if image_format not in ("jpeg", "png"):
+            return jsonify({"error": "`format` must be either `jpeg` or `png`."}), 400
+        return Response(
+            frame_stream.subscribe(image_format),
+            mimetype="multipart/x-mixed-replace; boundary=frame",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @server.route("/video/stats", methods=["GET"])
+    def http_get_video_stats():
+        return jsonify(frame_stream.get_metrics())
 
     @server.route("/encounter_rate", methods=["GET"])
     def http_get_encounter_rate():
@@ -46,21 +139,21 @@ def http_server() -> None:
 
     @server.route("/stats", methods=["GET"])
     def http_get_stats():
-        return jsonify(total_stats.get_total_stats())
+        return jsonify(total_stats.get_total_stats_snapshot())
+
+    @server.route("/custom_hooks", methods=["GET"])
+    def http_get_custom_hooks():
+        return jsonify(total_stats.hook_executor.get_metrics())
 
     @server.route("/event_flags", methods=["GET"])
     def http_get_event_flags():
         flag = request.args.get("flag")
 
         if flag and flag in _event_flags:
-            return jsonify({flag: get_event_flag(flag)})
+            resource = state_publisher.get("event_flags")
+            return jsonify({flag: resource.data.get(flag) if resource is not None else None})
         else:
-            result = {}
-
-            for flag in _event_flags:
-                result[flag] = get_event_flag(flag)
-
-            return result
+            return _published_response("event_flags")
 
     @server.route("/emulator", methods=["GET"])
     def http_get_emulator():
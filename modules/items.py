@@ -1,6 +1,6 @@
 from modules.console import console
 from modules.context import context
-from modules.memory import get_save_block, unpack_uint16
+from modules.memory import get_save_block, get_save_block_view, unpack_uint16
 from modules.pokemon import get_item_by_index
 
 
@@ -38,8 +38,13 @@ def get_items() -> dict:
     for pocket in pockets:
         items[pocket] = {}
 
+    save_block = get_save_block_view(1)
+    if save_block is None:
+        return items
+
     item_offsets = get_item_offsets()
-    b_Items = get_save_block(1, item_offsets[0][0], item_offsets[4][0] + item_offsets[4][1])
+    b_Items = save_block.items
+    item_key = get_item_key()
 
     for i in range(6):
         p = item_offsets[i][0] - item_offsets[0][0]
@@ -49,6 +54,6 @@ def get_items() -> dict:
 
             if item_id:
                 name = get_item_by_index(item_id).name
-                quantity = int(q ^ get_item_key()) if i != 0 else q
+                quantity = int(q ^ item_key) if i != 0 else q
                 items[pockets[i]][name] = quantity
     return items
@@ -1,9 +1,12 @@
 import atexit
+import itertools
 import PIL.Image
 import PIL.PngImagePlugin
+import struct
 import time
 import zlib
 from collections import deque
+from typing import Callable
 
 import sounddevice
 
@@ -49,6 +52,11 @@ class PerformanceTracker:
     time_spent_emulating: int = 0
     time_spent_total: int = 0
 
+    time_spent_checking_memory_watches_history: deque[int] = deque([0], maxlen=60)
+    time_spent_checking_memory_watches: int = 0
+    memory_watches_triggered_history: deque[int] = deque([0], maxlen=60)
+    memory_watches_triggered: int = 0
+
     def track_render(self) -> None:
         self.last_render_time = time.time_ns()
 
@@ -69,8 +77,13 @@ class PerformanceTracker:
                 time_spent_in_bot = self.time_spent_total - self.time_spent_emulating
                 self.time_spent_in_bot_fraction_history.append(time_spent_in_bot / self.time_spent_total)
 
+            self.time_spent_checking_memory_watches_history.append(self.time_spent_checking_memory_watches)
+            self.memory_watches_triggered_history.append(self.memory_watches_triggered)
+
             self.time_spent_total = 0
             self.time_spent_emulating = 0
+            self.time_spent_checking_memory_watches = 0
+            self.memory_watches_triggered = 0
 
         self.frame_counter += 1
 
@@ -78,6 +91,98 @@ class PerformanceTracker:
         return time.time_ns() - self.last_frame_time
 
 
+class MemoryWatch:
+    """
+    A region of memory that is compared to its previous contents after every frame, see
+    `LibmgbaEmulator.add_memory_watch()`.
+    """
+
+    def __init__(
+        self,
+        address: int,
+        view: memoryview,
+        callback: Callable[[bytes, bytes], None],
+        expected_value: bytes | None = None,
+    ):
+        self.address = address
+        self.length = len(view)
+        self.callback = callback
+        self.expected_value = expected_value
+        self._view = view
+        self._previous_value = view.tobytes()
+
+
+class SaveStateRing:
+    """
+    A fixed number of preallocated buffers that snapshots of the emulator state are stored in,
+    with new snapshots overwriting the oldest one.
+
+    libmgba serialises its state directly into these buffers, so creating or restoring a snapshot
+    does not allocate anything and never copies the state into a Python object. This is meant for
+    snapshots that are only kept around briefly (such as in `peek_frame()`) -- for anything that
+    needs to be stored, use `get_save_state()`.
+
+    Snapshots can also be given a name, in which case they are stored in a buffer of their own that
+    is not part of the rotation, so they stay around until a snapshot with the same name is created.
+
+    Snapshots only contain the emulator state itself, not the save game or the current screen
+    image. So if the game writes to the cartridge's save memory in between, that will not be
+    undone by restoring a snapshot.
+    """
+
+    def __init__(self, core, capacity: int = 16):
+        """
+        :param core: libmgba's `struct mCore*`
+        :param capacity: Number of snapshots that can be kept at the same time
+        """
+        self._core = core
+        self._state_size = core.stateSize(core)
+        self._buffers = [ffi.new("unsigned char[]", self._state_size) for _ in range(capacity)]
+        self._named_buffers: dict[str, any] = {}
+        self._next_snapshot_id = 0
+
+    def save(self, name: str | None = None) -> int | str:
+        """
+        :param name: (optional) Name of a snapshot that should be kept outside the ring buffer
+        :return: An ID that can be passed to `restore()`
+        """
+        if name is not None:
+            if name not in self._named_buffers:
+                self._named_buffers[name] = ffi.new("unsigned char[]", self._state_size)
+            buffer = self._named_buffers[name]
+            snapshot_id = name
+        else:
+            buffer = self._buffers[self._next_snapshot_id % len(self._buffers)]
+            snapshot_id = self._next_snapshot_id
+
+        if not self._core.saveState(self._core, buffer):
+            raise RuntimeError("Could not create a snapshot of the emulator state.")
+        if name is None:
+            self._next_snapshot_id += 1
+        return snapshot_id
+
+    def restore(self, snapshot_id: int | str) -> None:
+        """
+        :param snapshot_id: Return value of a previous call to `save()`
+        """
+        if not self.is_available(snapshot_id):
+            raise RuntimeError(f"Snapshot #{snapshot_id} does not exist or has already been overwritten.")
+        if isinstance(snapshot_id, str):
+            buffer = self._named_buffers[snapshot_id]
+        else:
+            buffer = self._buffers[snapshot_id % len(self._buffers)]
+        if not self._core.loadState(self._core, buffer):
+            raise RuntimeError(f"Could not restore snapshot #{snapshot_id}.")
+
+    def is_available(self, snapshot_id: int | str) -> bool:
+        if isinstance(snapshot_id, str):
+            return snapshot_id in self._named_buffers
+        return self._next_snapshot_id - len(self._buffers) <= snapshot_id < self._next_snapshot_id
+
+    def get_latest_snapshot_id(self) -> int | None:
+        return self._next_snapshot_id - 1 if self._next_snapshot_id > 0 else None
+
+
 class LibmgbaEmulator:
     """
     This class wraps libmgba and handles the actual emulation of a game, and exposes some of the
@@ -117,6 +222,15 @@ class LibmgbaEmulator:
         self._screen = mgba.image.Image(*self._core.desired_video_dimensions())
         self._core.set_video_buffer(self._screen)
         self._core.reset()
+        self._map_memory()
+
+        # Memory reads are cached until the emulation advances or the memory is changed by us, see `read_bytes()`
+        self._read_cache: dict[tuple[int, int], bytes] = {}
+        self._read_cache_hits: int = 0
+        self._read_cache_misses: int = 0
+
+        self._memory_watches: list[MemoryWatch] = []
+        self._snapshots = SaveStateRing(self._core._core)
 
         # Whenever the emulator closes, it stores the current state in `current_state.ss1`.
         # Load this file if it exists, to continue exactly where we left off.
@@ -171,8 +285,26 @@ class LibmgbaEmulator:
             console.print("[red bold]Failed to initialise sound![/] [red]Sound will be disabled.[/]")
             self._audio_stream = None
 
+    def _map_memory(self) -> None:
+        """
+        Creates persistent `memoryview`s of EWRAM, IWRAM and the ROM that point directly into
+        libmgba's memory.
+
+        Reading from these does not involve any cffi calls and slicing them does not copy any
+        data, so this is a lot cheaper than doing a `ffi.memmove()` into a new buffer for every
+        read.
+
+        libmgba allocates these memory areas once when the core is created, so the views stay
+        valid across resets and loading save states.
+        """
+        native_memory = self._core._native.memory
+        self._ewram = memoryview(ffi.buffer(ffi.cast("char*", native_memory.wram), 0x40000))
+        self._iwram = memoryview(ffi.buffer(ffi.cast("char*", native_memory.iwram), 0x8000))
+        self._rom = memoryview(ffi.buffer(ffi.cast("char*", native_memory.rom), native_memory.romSize))
+
     def reset(self) -> None:
         self._core.reset()
+        self._read_cache.clear()
 
     def create_save_state(self, suffix: str = "") -> None:
         states_directory = self._profile.path / "states"
@@ -352,40 +484,186 @@ class LibmgbaEmulator:
         vfile.write(state, len(state))
         vfile.seek(0, whence=0)
         self._core.load_state(vfile)
+        self._read_cache.clear()
 
-    def read_bytes(self, address: int, length: int = 1) -> bytes:
+    def create_snapshot(self, name: str | None = None) -> int | str:
         """
-        Reads a block of memory from an arbitrary address on the system
-        bus. That means that you need to specify the full memory address
-        rather than an offset relative to the start of a given memory
-        area.
+        Stores the current emulator state in a ring buffer of preallocated snapshots. This is a lot cheaper
+        than `get_save_state()`, but only the last couple of snapshots are kept (see `SaveStateRing`.)
 
-        This is helpful if you are working with the symbol table or
-        pointers.
+        :param name: (optional) Snapshots with a name are not part of the ring buffer and are kept until
+                     another snapshot with the same name is created
+        :return: An ID that can be passed to `restore_snapshot()`
+        """
+        return self._snapshots.save(name)
 
-        :param address: Full memory address to read from
-        :param length: Number of bytes to read
-        :return: Data read from that memory location
+    def restore_snapshot(self, snapshot_id: int | str) -> None:
+        """
+        Resets the emulator to the state it was in when a snapshot has been created.
+
+        :param snapshot_id: Return value of a previous call to `create_snapshot()`
+        """
+        self._snapshots.restore(snapshot_id)
+        self._read_cache.clear()
+
+    def rewind(self, snapshots: int = 1) -> None:
+        """
+        Restores one of the most recently created snapshots.
+
+        :param snapshots: How many snapshots to go back, 1 being the latest one
+        """
+        latest_snapshot_id = self._snapshots.get_latest_snapshot_id()
+        if latest_snapshot_id is None:
+            raise RuntimeError("There is no snapshot to rewind to.")
+        self.restore_snapshot(latest_snapshot_id + 1 - snapshots)
+
+    def _get_memory_view(self, address: int, length: int) -> tuple[memoryview, int]:
+        """
+        Figures out which memory area an address on the system bus belongs to.
+
+        :param address: Full memory address
+        :param length: Number of bytes that will be accessed, used for bounds checking
+        :return: The view of the memory area, and the offset of `address` within it
         """
         bank = address >> 0x18
-        result = bytearray(length)
         if bank == 0x2:
             offset = address & 0x3FFFF
-            if offset + length > 0x3FFFF:
+            if offset + length > 0x40000:
                 raise RuntimeError("Illegal range: EWRAM only extends from 0x02000000 to 0x0203FFFF")
-            ffi.memmove(result, ffi.cast("char*", self._core._native.memory.wram) + offset, length)
+            return self._ewram, offset
         elif bank == 0x3:
             offset = address & 0x7FFF
-            if offset + length > 0x7FFF:
+            if offset + length > 0x8000:
                 raise RuntimeError("Illegal range: IWRAM only extends from 0x03000000 to 0x03007FFF")
-            ffi.memmove(result, ffi.cast("char*", self._core._native.memory.iwram) + offset, length)
+            return self._iwram, offset
         elif bank >= 0x8:
             offset = address - 0x08000000
-            ffi.memmove(result, ffi.cast("char*", self._core._native.memory.rom) + offset, length)
+            if offset + length > len(self._rom):
+                raise RuntimeError(f"Illegal range: ROM only extends to {hex(0x08000000 + len(self._rom) - 1)}")
+            return self._rom, offset
         else:
             raise RuntimeError(f"Invalid memory address for reading: {hex(address)}")
+
+    def read_bytes(self, address: int, length: int = 1) -> bytes:
+        """
+        Reads a block of memory from an arbitrary address on the system
+        bus. That means that you need to specify the full memory address
+        rather than an offset relative to the start of a given memory
+        area.
+
+        This is helpful if you are working with the symbol table or
+        pointers.
+
+        The same symbols tend to be read many times within one frame (by the game state check,
+        task lookups, trainer info, ...) so results are cached. The cache is emptied whenever the
+        emulation advances, a save state is loaded or memory is written to.
+
+        :param address: Full memory address to read from
+        :param length: Number of bytes to read
+        :return: Data read from that memory location
+        """
+        key = (address, length)
+        result = self._read_cache.get(key)
+        if result is not None:
+            self._read_cache_hits += 1
+            return result
+
+        self._read_cache_misses += 1
+        view, offset = self._get_memory_view(address, length)
+        result = view[offset : offset + length].tobytes()
+        self._read_cache[key] = result
         return result
 
+    def get_read_cache_stats(self) -> tuple[int, int]:
+        """
+        :return: Number of cache hits and misses of `read_bytes()` since the emulator has been started
+        """
+        return self._read_cache_hits, self._read_cache_misses
+
+    def peek_bytes(self, address: int, length: int = 1) -> memoryview:
+        """
+        Like `read_bytes()`, but returns a view into the emulator's memory rather than a copy.
+
+        This does not allocate anything, but the returned data will change as soon as the
+        emulation advances -- so it should only be used for data that is being processed
+        immediately and not kept around.
+
+        :param address: Full memory address to read from
+        :param length: Number of bytes to read
+        :return: A read-only view of that memory location
+        """
+        view, offset = self._get_memory_view(address, length)
+        return view[offset : offset + length].toreadonly()
+
+    def read_uint16(self, address: int) -> int:
+        """
+        :param address: Full memory address to read from
+        :return: The little-endian 16-bit unsigned integer at that address
+        """
+        view, offset = self._get_memory_view(address, 2)
+        return struct.unpack_from("<H", view, offset)[0]
+
+    def read_uint32(self, address: int) -> int:
+        """
+        :param address: Full memory address to read from
+        :return: The little-endian 32-bit unsigned integer at that address
+        """
+        view, offset = self._get_memory_view(address, 4)
+        return struct.unpack_from("<I", view, offset)[0]
+
+    def add_memory_watch(
+        self,
+        address: int,
+        length: int,
+        callback: Callable[[bytes, bytes], None],
+        expected_value: bytes | None = None,
+    ) -> MemoryWatch:
+        """
+        Registers a callback that is called as soon as a memory region changes, rather than having
+        to read and compare it every frame.
+
+        All watches are checked in one go after each frame has been emulated, by comparing the
+        region's current contents to those at the end of the previous frame. Changes made within a
+        single frame that end up with the same value as before are not noticed.
+
+        :param address: Full memory address of the region to watch
+        :param length: Size of the region in bytes
+        :param callback: Will be called with the previous and the current contents of the region
+        :param expected_value: If set, the callback will only be called if the region changes to
+                               exactly this value
+        :return: The watch, which can be passed to `remove_memory_watch()`
+        """
+        watch = MemoryWatch(address, self.peek_bytes(address, length), callback, expected_value)
+        self._memory_watches.append(watch)
+        return watch
+
+    def remove_memory_watch(self, watch: MemoryWatch) -> None:
+        if watch in self._memory_watches:
+            self._memory_watches.remove(watch)
+
+    def get_memory_watch_stats(self) -> tuple[int, int, int]:
+        """
+        :return: Number of active watches, number of times a watch has been triggered in the last second,
+                 and the time (in nanoseconds) spent on checking watches in the last second
+        """
+        return (
+            len(self._memory_watches),
+            self._performance_tracker.memory_watches_triggered_history[-1],
+            self._performance_tracker.time_spent_checking_memory_watches_history[-1],
+        )
+
+    def _check_memory_watches(self) -> None:
+        begin = time.time_ns()
+        for watch in self._memory_watches.copy():
+            if watch._view != watch._previous_value:
+                previous_value = watch._previous_value
+                current_value = watch._view.tobytes()
+                watch._previous_value = current_value
+                if watch.expected_value is None or current_value == watch.expected_value:
+                    self._performance_tracker.memory_watches_triggered += 1
+                    watch.callback(previous_value, current_value)
+        self._performance_tracker.time_spent_checking_memory_watches += time.time_ns() - begin
+
     def write_bytes(self, address: int, data: bytes) -> None:
         """
         Writes to an arbitrary address on the system bus.
@@ -396,20 +674,11 @@ class LibmgbaEmulator:
         :param address: The full memory address to write to
         :param data: Data to write
         """
-        bank = address >> 0x18
-        length = len(data)
-        if bank == 0x2:
-            offset = address & 0x3FFFF
-            if offset + length > 0x3FFFF:
-                raise RuntimeError("Illegal range: EWRAM only extends from 0x02000000 to 0x0203FFFF")
-            ffi.memmove(ffi.cast("char*", self._core._native.memory.wram) + offset, data, length)
-        elif bank == 0x3:
-            offset = address & 0x7FFF
-            if offset + length > 0x7FFF:
-                raise RuntimeError("Illegal range: IWRAM only extends from 0x03000000 to 0x03007FFF")
-            ffi.memmove(ffi.cast("char*", self._core._native.memory.iwram) + offset, data, length)
-        else:
+        if address >> 0x18 not in (0x2, 0x3):
             raise RuntimeError(f"Invalid memory address for writing: {hex(address)}")
+        view, offset = self._get_memory_view(address, len(data))
+        view[offset : offset + len(data)] = data
+        self._read_cache.clear()
 
     def get_inputs(self) -> int:
         """
@@ -447,6 +716,17 @@ class LibmgbaEmulator:
     def get_current_screen_image(self) -> PIL.Image.Image:
         return self._screen.to_pil()
 
+    def copy_current_screen(self, target: bytearray) -> None:
+        """
+        Copies the raw content of the frame buffer (4 bytes per pixel, `RGBX`) into an existing buffer.
+
+        This is a lot cheaper than `get_current_screen_image()` and does not allocate anything, so
+        it can be used to grab frames without slowing down the emulation.
+
+        :param target: Buffer to copy the frame into, must be `width * height * 4` bytes long
+        """
+        ffi.memmove(target, self._screen.buffer, len(target))
+
     def get_screenshot(self) -> PIL.Image.Image:
         current_state = None
         if not self._video_enabled:
@@ -458,13 +738,14 @@ class LibmgbaEmulator:
             # So the screenshot will be 1 frame late, but the emulation will resume from the same
             # state.
             self.set_video_enabled(True)
-            current_state = self.get_save_state()
+            current_state = self.create_snapshot()
             self._core.run_frame()
+            self._read_cache.clear()
 
         screenshot = self.get_current_screen_image().convert("RGB")
 
         if current_state is not None:
-            self.load_save_state(current_state)
+            self.restore_snapshot(current_state)
             self.set_video_enabled(False)
 
         return screenshot
@@ -496,26 +777,76 @@ class LibmgbaEmulator:
         :param frames_to_advance: Optional number of frames to advance (defaults to 1)
         :return: The return value of the callback function
         """
-        original_emulator_state = self.get_save_state()
+        original_emulator_state = self.create_snapshot()
         for i in range(frames_to_advance):
             self._core.run_frame()
+        self._read_cache.clear()
         result = callback()
-        self.load_save_state(original_emulator_state)
+        self.restore_snapshot(original_emulator_state)
         return result
 
     def run_single_frame(self) -> None:
         """
         Runs the emulation for a single frame, and then waits if necessary to hit the target FPS rate.
         """
+        self._run_frame()
+
+    def run_frames(
+        self,
+        frame_count: int | None,
+        until: Callable[[], bool] | None = None,
+        inputs: str | list[str] | None = None,
+    ) -> bool:
+        """
+        Runs the emulation for multiple frames, for code that just needs to wait for something to happen.
+
+        Unlike returning to the main loop after every frame, this skips everything the main loop does in
+        between frames (such as stepping the bot mode and publishing data for the HTTP server), so waiting
+        with the emulation speed unthrottled costs very little time outside the emulator.
+
+        The frame callback is still called after every frame, so that pausing/stepping in the GUI and
+        stopping a worker process also work while waiting. The GUI only renders when it is time for a new
+        frame anyway.
+
+        :param frame_count: Maximum number of frames to run, or None to keep going until `until` is met
+        :param until: (optional) Condition that is checked before each frame; as soon as it returns True,
+                      this function returns without emulating any further frames
+        :param inputs: (optional) Button or list of buttons to press, they will be pressed on every other
+                       frame so that the game registers each one as a new button press
+        :return: True if the `until` condition has been met, False if `frame_count` frames have been emulated
+        """
+        if inputs is None:
+            input_bits = 0
+        elif isinstance(inputs, str):
+            input_bits = input_map[inputs]
+        else:
+            input_bits = 0
+            for button in inputs:
+                input_bits |= input_map[button]
+
+        run_frame = self._run_frame
+        for _ in range(frame_count) if frame_count is not None else itertools.repeat(None):
+            if until is not None and until():
+                return True
+            if input_bits:
+                self._pressed_inputs |= input_bits & ~self._prev_pressed_inputs
+            run_frame()
+
+        return until is not None and until()
+
+    def _run_frame(self) -> None:
         self.set_inputs(self._pressed_inputs | self._held_inputs)
 
         begin = time.time_ns()
         self._core.run_frame()
+        self._read_cache.clear()
         self._performance_tracker.time_spent_emulating += time.time_ns() - begin
 
         begin = time.time_ns()
         self._prev_pressed_inputs = self._pressed_inputs
         self._pressed_inputs = 0
+        if self._memory_watches:
+            self._check_memory_watches()
         self._on_frame_callback()
 
         # Limiting FPS is achieved by using a blocking API for audio playback -- meaning we give it
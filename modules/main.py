@@ -4,8 +4,11 @@ from threading import Thread
 from modules.config import config, load_config_from_directory
 from modules.console import console
 from modules.context import context
+from modules.event_stream import event_stream
+from modules.frame_stream import frame_stream
 from modules.memory import get_game_state, GameState
 from modules.pokemon import opponent_changed, get_opponent
+from modules.state_snapshot import state_publisher
 from modules.temp import temp_run_from_battle
 
 
@@ -78,6 +81,9 @@ def main_loop() -> None:
                 context.bot_mode = "Manual"
 
             context.emulator.run_single_frame()
+            state_publisher.update()
+            event_stream.update()
+            frame_stream.update()
 
     except SystemExit:
         raise
@@ -1,9 +1,15 @@
 import sys
 import struct
 from enum import IntEnum
+from typing import TYPE_CHECKING, Callable
+
+import numpy
 
 from modules.context import context
-from modules.game import get_symbol, get_symbol_name, get_event_flag_offset
+from modules.game import get_symbol, get_symbol_name, get_event_flag_offset, get_event_flag_table
+
+if TYPE_CHECKING:
+    from modules.libmgba import MemoryWatch
 
 
 def unpack_uint16(bytes: bytes) -> int:
@@ -55,6 +61,118 @@ def read_symbol(name: str, offset: int = 0x0, size: int = 0x0) -> bytes:
         raise
 
 
+class SymbolHandle:
+    """
+    A symbol whose address and size are only looked up once (whenever a ROM is loaded), rather
+    than every time it is read.
+
+    It also keeps a view into the emulator's memory for the symbol's memory area, so reading from
+    it skips the bank decoding that `read_bytes()` has to do. This makes it the preferred way to
+    access symbols that are read every frame, such as `gMain`:
+
+        gMain = SymbolHandle("gMain")
+        callback2 = gMain.read_uint32(4)
+
+    Reads always return the current contents of the memory, they do not go through the emulator's
+    read cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.address: int | None = None
+        self.length: int = 0
+        self._view: memoryview | None = None
+        self._emulator = None
+        _symbol_handles.append(self)
+
+    def resolve(self) -> None:
+        """
+        Looks up the address and size of the symbol in the symbol table of the current ROM. This
+        is called for all handles by `set_rom()`, so it should not be necessary to call it manually.
+        """
+        self._view = None
+        self._emulator = None
+        try:
+            self.address, self.length = get_symbol(self.name)
+        except RuntimeError:
+            # Some symbols only exist in some of the games, so this only becomes an error
+            # once someone tries to read it.
+            self.address, self.length = None, 0
+
+    def _get_view(self) -> memoryview:
+        if self._emulator is not context.emulator:
+            if self.address is None:
+                self.resolve()
+                if self.address is None:
+                    raise RuntimeError(f"Unknown symbol: {self.name}!")
+            self._view = context.emulator.peek_bytes(self.address, self.length)
+            self._emulator = context.emulator
+        return self._view
+
+    def read(self, offset: int = 0, size: int = 0) -> bytes:
+        """
+        :param offset: (optional) add n bytes to the address of symbol
+        :param size: (optional) override the size to read n bytes
+        :return: (bytes)
+        """
+        if size <= 0:
+            size = self.length
+        view = self._get_view()
+        if offset + size > len(view):
+            return context.emulator.read_bytes(self.address + offset, size)
+        return view[offset : offset + size].tobytes()
+
+    def read_uint8(self, offset: int = 0) -> int:
+        return self._get_view()[offset]
+
+    def read_uint16(self, offset: int = 0) -> int:
+        return struct.unpack_from("<H", self._get_view(), offset)[0]
+
+    def read_uint32(self, offset: int = 0) -> int:
+        return struct.unpack_from("<I", self._get_view(), offset)[0]
+
+    def write(self, data: bytes, offset: int = 0) -> bool:
+        return write_symbol(self.name, data, offset)
+
+
+_symbol_handles: list[SymbolHandle] = []
+
+
+def resolve_symbol_handles() -> None:
+    """
+    Updates the addresses of all `SymbolHandle`s after a ROM has been loaded, and forgets
+    everything that has been derived from the previous ROM's symbol table.
+    """
+    for handle in _symbol_handles:
+        handle.resolve()
+    _reset_task_cache()
+    _build_game_state_table()
+
+
+def watch_symbol(
+    name: str,
+    callback: Callable[[bytes, bytes], None],
+    offset: int = 0x0,
+    size: int = 0x0,
+    equals: bytes | None = None,
+) -> "MemoryWatch":
+    """
+    Calls a function whenever a symbol's value changes, see `LibmgbaEmulator.add_memory_watch()`.
+
+    :param name: name of the symbol to watch
+    :param callback: will be called with the previous and the current value of the symbol
+    :param offset: (optional) add n bytes to the address of symbol
+    :param size: (optional) override the size to watch n bytes
+    :param equals: (optional) only call the callback if the symbol changes to this value
+    :return: the watch, which can be passed to `LibmgbaEmulator.remove_memory_watch()`
+    """
+    addr, length = get_symbol(name)
+    if size <= 0:
+        size = length
+
+    return context.emulator.add_memory_watch(addr + offset, size, callback, equals)
+
+
 def write_symbol(name: str, data: bytes, offset: int = 0x0) -> bool:
     try:
         addr, length = get_symbol(name)
@@ -71,43 +189,190 @@ def write_symbol(name: str, data: bytes, offset: int = 0x0) -> bool:
         sys.exit(1)
 
 
+# Layout of `struct Task`: func, isActive, prev, next, priority, data[16]
+_task_struct = struct.Struct("<IBBBB32s")
+_tasks_raw: bytes = b""
+_tasks_by_address: dict[int, dict] = {}
+_task_address_cache: dict[str, int | None] = {}
+
+
+def _decode_tasks(pretty_names: bool = False) -> list:
+    return [
+        {
+            "func": get_symbol_name(func - 1, pretty_names) or "0x" + pack_uint32(func).hex(),
+            "func_address": func - 1,
+            "isActive": bool(is_active),
+            "prev": prev_task,
+            "next": next_task,
+            "priority": priority,
+            "data": data,
+        }
+        for func, is_active, prev_task, next_task, priority, data in _task_struct.iter_unpack(_gTasks.read())
+    ]
+
+
 def parse_tasks(pretty_names: bool = False) -> list:
-    try:
-        gTasks = read_symbol("gTasks")
-        tasks = []
-        for x in range(16):
-            name = get_symbol_name(unpack_uint32(gTasks[(x * 40) : (x * 40 + 4)]) - 1, pretty_names)
-            if name == "":
-                name = "0x" + gTasks[(x * 40) : (x * 40 + 4)].hex()
-            tasks.append(
-                {
-                    "func": name,
-                    "isActive": bool(gTasks[(x * 40 + 4)]),
-                    "prev": gTasks[(x * 40 + 5)],
-                    "next": gTasks[(x * 40 + 6)],
-                    "priority": gTasks[(x * 40 + 7)],
-                    "data": gTasks[(x * 40 + 8) : (x * 40 + 40)],
-                }
-            )
-        return tasks
-    except SystemExit:
-        raise
+    return _decode_tasks(pretty_names)
+
+
+def _get_task_index() -> dict[int, dict]:
+    """
+    :return: All tasks indexed by the address of their function, decoded only once as long as
+             `gTasks` does not change
+    """
+    global _tasks_raw, _tasks_by_address
+
+    raw = _gTasks.read()
+    if raw != _tasks_raw:
+        tasks_by_address = {}
+        for task in _decode_tasks():
+            tasks_by_address.setdefault(task["func_address"], task)
+        _tasks_raw = raw
+        _tasks_by_address = tasks_by_address
+
+    return _tasks_by_address
 
 
 def get_task(func: str) -> dict:
-    tasks = parse_tasks()
-    for task in tasks:
-        if task["func"] == func:
-            return task
-    return {}
+    """
+    :param func: Name of the task function, e.g. `TASK_HANDLEMENUINPUT`
+    :return: The first task in `gTasks` that runs this function, or an empty dict if there is none
+    """
+    if func not in _task_address_cache:
+        try:
+            _task_address_cache[func] = get_symbol(func)[0]
+        except RuntimeError:
+            _task_address_cache[func] = None
+
+    address = _task_address_cache[func]
+    if address is None:
+        return {}
+    return _get_task_index().get(address, {})
+
+
+def _reset_task_cache() -> None:
+    global _tasks_raw
+
+    _tasks_raw = b""
+    _tasks_by_address.clear()
+    _task_address_cache.clear()
 
 
-def get_save_block(num: int = 1, offset: int = 0, size: int = 0) -> bytes:
+class SaveBlockView:
+    """
+    A copy of a whole save block, taken with a single read.
+
+    All the parts of the save block that the bot is interested in can be taken from this without going
+    back to the emulator, and they are guaranteed to be from the same frame. The underlying read goes
+    through the emulator's read cache, so all views of a save block that are requested during the same
+    frame share the same copy.
+    """
+
+    def __init__(self, num: int, data: bytes):
+        self.num = num
+        self.data = data
+
+    def read(self, offset: int = 0, size: int = 0) -> bytes:
+        """
+        :param offset: Offset from the beginning of the save block
+        :param size: Number of bytes to read, or 0 to read until the end of the save block
+        :return: (bytes)
+        """
+        if size <= 0:
+            return self.data[offset:]
+        return self.data[offset : offset + size]
+
+    def read_uint16(self, offset: int = 0) -> int:
+        return struct.unpack_from("<H", self.data, offset)[0]
+
+    def read_uint32(self, offset: int = 0) -> int:
+        return struct.unpack_from("<I", self.data, offset)[0]
+
+    @property
+    def items(self) -> bytes:
+        """
+        :return: All item pockets and the PC's item storage (save block 1), starting at the first pocket
+                 from `get_item_offsets()`
+        """
+        from modules.items import get_item_offsets
+
+        item_offsets = get_item_offsets()
+        start = item_offsets[0][0]
+        end = max(offset + size for offset, size in item_offsets)
+        return self.read(start, end - start)
+
+    @property
+    def event_flags(self) -> bytes:
+        """
+        :return: The event flag region (save block 1), as described by `get_event_flag_table()`
+        """
+        table = get_event_flag_table()
+        return self.read(table.offset, table.size)
+
+    @property
+    def daycare(self) -> bytes:
+        """
+        :return: The daycare data (save block 1), i.e. both Pokémon, their step counters and the offspring's
+                 personality value
+        """
+        return self.read(0x3030, 0x120)
+
+
+class _SaveBlockLocation:
+    """
+    Finds a save block in memory.
+
+    Emerald, FireRed and LeafGreen move their save blocks around in memory every now and then (when
+    saving, loading or changing maps), so they have to be found by following `gSaveBlock{n}Ptr`. That
+    pointer is read through a `SymbolHandle`, which makes checking whether the save block has been
+    relocated about as cheap as reading a local variable. Ruby and Sapphire do not have this pointer
+    and keep their save blocks in a fixed place.
+
+    The last view is kept around, so as long as the save block has not moved and the emulator's read
+    cache still holds its contents (i.e. until the emulation advances or memory is written to), the
+    same view is returned again.
+    """
+
+    def __init__(self, num: int):
+        self._num = num
+        self._pointer = SymbolHandle(f"gSaveBlock{num}Ptr")
+        self._save_block = SymbolHandle(f"gSaveBlock{num}")
+        self._view: SaveBlockView | None = None
+
+    def get_view(self) -> SaveBlockView | None:
+        if self._pointer.address is not None:
+            address = struct.unpack_from("<I", self._pointer._get_view())[0]
+            if address == 0:
+                return None
+        else:
+            address = self._save_block.address
+
+        data = context.emulator.read_bytes(address, self._save_block.length)
+        if self._view is None or self._view.data is not data:
+            self._view = SaveBlockView(self._num, data)
+        return self._view
+
+
+_save_block_locations = {1: _SaveBlockLocation(1), 2: _SaveBlockLocation(2)}
+
+
+def get_save_block_view(num: int = 1) -> SaveBlockView | None:
+    """
+    :param num: 1 or 2 (gSaveblock1 or gSaveblock2)
+    :return: A view of the whole save block, or None if it has not been allocated yet
+    """
+    return _save_block_locations[num].get_view()
+
+
+def get_save_block(num: int = 1, offset: int = 0, size: int = 0) -> bytes | None:
     """
     The Generation III save file is broken up into two game save blocks, this function will return sections from these
     save blocks. Emerald, FireRed and LeafGreen SaveBlocks will randomly move around in memory, which requires following
      a pointer to find them reliably.
 
+    The whole save block is only read once per frame (see `get_save_block_view()`), so reading several small parts
+    of it is cheap.
+
     :param num: 1 or 2 (gSaveblock1 or gSaveblock2)
     see: https://bulbapedia.bulbagarden.net/wiki/Save_data_structure_(Generation_III)#Game_save_A.2C_Game_save_B
     :param offset: Read n bytes offset from beginning of the save block, use with `size` - useful to reduce amount of
@@ -116,18 +381,16 @@ def get_save_block(num: int = 1, offset: int = 0, size: int = 0) -> bytes:
     :return: SaveBlock (bytes)
     """
     # https://bulbapedia.bulbagarden.net/wiki/Save_data_structure_(Generation_III)
-    try:
-        if not size:
-            size = get_symbol(f"GSAVEBLOCK{num}")[1]
-        if context.rom.game_title in ["POKEMON EMER", "POKEMON FIRE", "POKEMON LEAF"]:
-            p_Trainer = unpack_uint32(read_symbol(f"gSaveBlock{num}Ptr"))
-            if p_Trainer == 0:
-                return None
-            return context.emulator.read_bytes(p_Trainer + offset, size)
-        else:
-            return read_symbol(f"gSaveBlock{num}", offset=offset, size=size)
-    except SystemExit:
-        raise
+    save_block = _save_block_locations[num].get_view()
+    if save_block is None:
+        return None
+    return save_block.read(offset, size)
+
+
+_gMain = SymbolHandle("gMain")
+_gTasks = SymbolHandle("gTasks")
+_gObjectEvents = SymbolHandle("gObjectEvents")
+_sPlayTimeCounterState = SymbolHandle("sPlayTimeCounterState")
 
 
 class GameState(IntEnum):
@@ -148,35 +411,88 @@ class GameState(IntEnum):
 
 
 def get_game_state_symbol() -> str:
-    callback2 = read_symbol("gMain", 4, 4)  # gMain.callback2
-    addr = unpack_uint32(callback2) - 1
-    return get_symbol_name(addr)
+    callback2 = _gMain.read_uint32(4)  # gMain.callback2
+    return get_symbol_name(callback2 - 1)
+
+
+# Maps the name of each function that can be in `gMain.callback2` to the state that the game is in while
+# that function is running. Not all of these exist in all games.
+_game_state_callbacks: dict[str, GameState] = {
+    "CB2_OVERWORLD": GameState.OVERWORLD,
+    "BATTLEMAINCB2": GameState.BATTLE,
+    "CB2_BAGMENURUN": GameState.BAG_MENU,
+    "SUB_80A3118": GameState.BAG_MENU,
+    "CB2_UPDATEPARTYMENU": GameState.PARTY_MENU,
+    "CB2_PARTYMENUMAIN": GameState.PARTY_MENU,
+    "CB2_INITBATTLE": GameState.BATTLE_STARTING,
+    "CB2_HANDLESTARTBATTLE": GameState.BATTLE_STARTING,
+    "CB2_ENDWILDBATTLE": GameState.BATTLE_ENDING,
+    "CB2_LOADMAP": GameState.CHANGE_MAP,
+    "CB2_LOADMAP2": GameState.CHANGE_MAP,
+    "CB2_DOCHANGEMAP": GameState.CHANGE_MAP,
+    "SUB_810CC80": GameState.CHANGE_MAP,
+    "CB2_STARTERCHOOSE": GameState.CHOOSE_STARTER,
+    "CB2_CHOOSESTARTER": GameState.CHOOSE_STARTER,
+    "CB2_INITCOPYRIGHTSCREENAFTERBOOTUP": GameState.TITLE_SCREEN,
+    "CB2_WAITFADEBEFORESETUPINTRO": GameState.TITLE_SCREEN,
+    "CB2_SETUPINTRO": GameState.TITLE_SCREEN,
+    "CB2_INTRO": GameState.TITLE_SCREEN,
+    "CB2_INITTITLESCREEN": GameState.TITLE_SCREEN,
+    "CB2_TITLESCREENRUN": GameState.TITLE_SCREEN,
+    "CB2_INITCOPYRIGHTSCREENAFTERTITLESCREEN": GameState.TITLE_SCREEN,
+    "CB2_INITMAINMENU": GameState.TITLE_SCREEN,
+    "MAINCB2": GameState.TITLE_SCREEN,
+    "MAINCB2_INTRO": GameState.TITLE_SCREEN,
+    "CB2_MAINMENU": GameState.MAIN_MENU,
+}
+
+# Same as above, but keyed by the value `gMain.callback2` has while that function is running (the
+# function's address plus 1, since they are Thumb functions.) This is built by `set_rom()`.
+_game_state_by_callback: dict[int, GameState] = {}
+
+_last_game_state: GameState | None = None
+_game_state_listeners: list[Callable[[GameState, GameState], None]] = []
+
+
+def _build_game_state_table() -> None:
+    global _last_game_state
+
+    _game_state_by_callback.clear()
+    for symbol_name, game_state in _game_state_callbacks.items():
+        try:
+            _game_state_by_callback[get_symbol(symbol_name)[0] + 1] = game_state
+        except RuntimeError:
+            pass
+    _last_game_state = None
+
+
+def add_game_state_listener(callback: Callable[[GameState, GameState], None]) -> None:
+    """
+    Registers a function that will be called whenever `get_game_state()` notices that the game
+    state has changed since the last time it was called.
+
+    :param callback: Will be called with the previous and the new game state
+    """
+    _game_state_listeners.append(callback)
+
+
+def remove_game_state_listener(callback: Callable[[GameState, GameState], None]) -> None:
+    if callback in _game_state_listeners:
+        _game_state_listeners.remove(callback)
 
 
 def get_game_state() -> GameState:
-    match get_game_state_symbol():
-        case "CB2_OVERWORLD":
-            return GameState.OVERWORLD
-        case "BATTLEMAINCB2":
-            return GameState.BATTLE
-        case "CB2_BAGMENURUN" | "SUB_80A3118":
-            return GameState.BAG_MENU
-        case "CB2_UPDATEPARTYMENU" | "CB2_PARTYMENUMAIN":
-            return GameState.PARTY_MENU
-        case "CB2_INITBATTLE" | "CB2_HANDLESTARTBATTLE":
-            return GameState.BATTLE_STARTING
-        case "CB2_ENDWILDBATTLE":
-            return GameState.BATTLE_ENDING
-        case "CB2_LOADMAP" | "CB2_LOADMAP2" | "CB2_DOCHANGEMAP" | "SUB_810CC80":
-            return GameState.CHANGE_MAP
-        case "CB2_STARTERCHOOSE" | "CB2_CHOOSESTARTER":
-            return GameState.CHOOSE_STARTER
-        case "CB2_INITCOPYRIGHTSCREENAFTERBOOTUP" | "CB2_WAITFADEBEFORESETUPINTRO" | "CB2_SETUPINTRO" | "CB2_INTRO" | "CB2_INITTITLESCREEN" | "CB2_TITLESCREENRUN" | "CB2_INITCOPYRIGHTSCREENAFTERTITLESCREEN" | "CB2_INITMAINMENU" | "MAINCB2" | "MAINCB2_INTRO":
-            return GameState.TITLE_SCREEN
-        case "CB2_MAINMENU":
-            return GameState.MAIN_MENU
-        case _:
-            return GameState.UNKNOWN
+    global _last_game_state
+
+    game_state = _game_state_by_callback.get(_gMain.read_uint32(4), GameState.UNKNOWN)  # gMain.callback2
+    if game_state != _last_game_state:
+        previous_game_state = _last_game_state
+        _last_game_state = game_state
+        if previous_game_state is not None:
+            for callback in _game_state_listeners:
+                callback(previous_game_state, game_state)
+
+    return game_state
 
 
 def game_has_started() -> bool:
@@ -184,8 +500,8 @@ def game_has_started() -> bool:
     Reports whether the game has progressed past the main menu (save loaded
     or new game started.)
     """
-    return read_symbol("sPlayTimeCounterState") != b"\x00" and 0 != int.from_bytes(
-        read_symbol("gObjectEvents", 0x10, 9), byteorder="little"
+    return _sPlayTimeCounterState.read() != b"\x00" and 0 != int.from_bytes(
+        _gObjectEvents.read(0x10, 9), byteorder="little"
     )
 
 
@@ -194,3 +510,19 @@ def get_event_flag(flag_name: str) -> bool:
     flag_byte = get_save_block(1, offset=flag_offset[0], size=1)
 
     return bool((flag_byte[0] >> (flag_offset[1])) & 1)
+
+
+def get_event_flags() -> dict[str, bool]:
+    """
+    Reads all event flags at once, which is a lot faster than calling `get_event_flag()` for every one
+    of them: The whole flag region of save block 1 is read in a single go and then unpacked into bits.
+
+    :return: A dict of all event flag names and whether they are set
+    """
+    save_block = get_save_block_view(1)
+    if save_block is None:
+        return {}
+
+    table = get_event_flag_table()
+    bits = numpy.unpackbits(numpy.frombuffer(save_block.event_flags, dtype=numpy.uint8), bitorder="little")
+    return dict(zip(table.names, bits[table.bit_indices].astype(bool).tolist()))
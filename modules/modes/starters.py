@@ -5,10 +5,12 @@ from modules.config import config
 from modules.console import console
 from modules.context import context
 from modules.encounter import encounter_pokemon
-from modules.files import get_rng_state_history, save_rng_state_history
+from modules.files import RngStateHistory, get_rng_state_history
 from modules.memory import read_symbol, get_game_state, GameState, get_task, write_symbol, unpack_uint32, pack_uint32
+from modules.multi_instance import owns_rng_seed
 from modules.navigation import follow_path
-from modules.pokemon import get_party, opponent_changed
+from modules.pokemon import Pokemon, get_party, opponent_changed
+from modules.rng import find_pid_advance, predict_pokemon
 from modules.trainer import trainer
 
 
@@ -46,6 +48,34 @@ class ModeStarterStates(Enum):
     INCOMPATIBLE = 18
 
 
+class StarterSession:
+    """
+    A new `ModeStarters` instance is created for every attempt, so anything that needs to carry over from
+    one attempt to the next is stored in here instead.
+    """
+
+    def __init__(self) -> None:
+        self.fast_reset_snapshot: str | None = None
+
+        # See `should_play_out()` and `calibrate_prediction()`
+        self.checked_rng: int | None = None
+        self.prediction_advance: int | None = None
+        self.prediction_advance_candidate: int | None = None
+
+
+_sessions: dict[str, StarterSession] = {}
+
+
+def get_starter_session(starter: str) -> StarterSession:
+    """
+    :param starter: Name of the starter Pokémon that is being hunted
+    :return: The state that is shared between all attempts for this starter
+    """
+    if starter not in _sessions:
+        _sessions[starter] = StarterSession()
+    return _sessions[starter]
+
+
 class ModeStarters:
     def __init__(self) -> None:
         self.state: ModeStarterStates = ModeStarterStates.RESET
@@ -90,11 +120,81 @@ class ModeStarters:
             self.state = ModeStarterStates.INCOMPATIBLE
 
         if not config["cheats"]["starters_rng"]:
-            self.rng_history: list = get_rng_state_history(config["general"]["starter"])
+            self.rng_history: RngStateHistory = get_rng_state_history(config["general"]["starter"])
+
+        self.session: StarterSession = get_starter_session(config["general"]["starter"])
 
     def update_state(self, state: ModeStarterStates):
         self.state: ModeStarterStates = state
 
+    def create_fast_reset_snapshot(self) -> None:
+        """
+        If the `fast_reset` cheat is enabled, this remembers the first controllable frame after loading the save
+        game so that the following attempts can skip the intro, title screen and main menu.
+        """
+        if config["cheats"].get("fast_reset", False) and self.session.fast_reset_snapshot is None:
+            self.session.fast_reset_snapshot = context.emulator.create_snapshot("fast_reset")
+
+    def should_play_out(self, rng: int) -> bool:
+        """
+        Decides whether the current frame should be used for an attempt.
+
+        If the `starters_prediction` cheat is enabled and it is known after how many RNG advances the starter
+        will be generated (see `calibrate_prediction()`), the starter's PID is predicted and frames that would
+        not lead to a shiny are skipped without playing them out.
+
+        :param rng: Current value of `gRngValue`
+        :return: Whether an attempt should be made with this RNG value
+        """
+        if rng in self.rng_history or not owns_rng_seed(rng):
+            return False
+
+        if config["cheats"].get("starters_prediction", False) and self.session.prediction_advance is not None:
+            prediction = predict_pokemon(rng, trainer.get_tid(), trainer.get_sid(), 1, self.session.prediction_advance)
+            if not prediction[0]["shiny"]:
+                return False
+
+        self.session.checked_rng = rng
+        return True
+
+    def calibrate_prediction(self, starter: Pokemon) -> None:
+        """
+        Figures out how many RNG advances there are between `RNG_CHECK` and the starter being generated, by
+        searching for the starter's PID in the RNG sequence. The number of advances is only used for predictions
+        once it has been the same for two attempts in a row, and is discarded as soon as it does not match.
+
+        :param starter: The starter Pokémon that has just been received
+        """
+        if not config["cheats"].get("starters_prediction", False) or self.session.checked_rng is None:
+            return
+
+        advance = find_pid_advance(self.session.checked_rng, starter.personality_value, 10_000)
+        if self.session.prediction_advance is not None and advance != self.session.prediction_advance:
+            console.print("[yellow]Starter did not match the RNG prediction, recalibrating...[/]")
+            self.session.prediction_advance = None
+        elif (
+            self.session.prediction_advance is None
+            and advance is not None
+            and advance == self.session.prediction_advance_candidate
+        ):
+            console.print(f"[cyan]Starter is generated {advance:,} RNG advances after the unique frame check.[/]")
+            self.session.prediction_advance = advance
+        self.session.prediction_advance_candidate = advance
+        self.session.checked_rng = None
+
+    def restore_fast_reset_snapshot(self) -> None:
+        """
+        Jumps back to the frame stored by `create_fast_reset_snapshot()`. Since that would otherwise always lead
+        to the same RNG state (and thus the same starter), a random `gRngValue` that has not been seen before is
+        injected.
+        """
+        context.emulator.restore_snapshot(self.session.fast_reset_snapshot)
+        while True:
+            rng = random.randint(0, 2**32 - 1)
+            if owns_rng_seed(rng) and (config["cheats"]["starters_rng"] or rng not in self.rng_history):
+                break
+        write_symbol("gRngValue", pack_uint32(rng))
+
     def step(self):
         if self.state == ModeStarterStates.INCOMPATIBLE:
             message = (
@@ -111,8 +211,12 @@ class ModeStarters:
                 case Regions.KANTO_STARTERS:
                     match self.state:
                         case ModeStarterStates.RESET:
-                            context.emulator.reset()
-                            self.update_state(ModeStarterStates.TITLE)
+                            if self.session.fast_reset_snapshot is not None:
+                                self.restore_fast_reset_snapshot()
+                                self.update_state(ModeStarterStates.RNG_CHECK)
+                            else:
+                                context.emulator.reset()
+                                self.update_state(ModeStarterStates.TITLE)
 
                         case ModeStarterStates.TITLE:
                             match get_game_state():
@@ -120,6 +224,7 @@ class ModeStarters:
                                     context.emulator.press_button("A")
                                 case GameState.MAIN_MENU:  # TODO assumes trainer is in Oak's lab, facing a ball
                                     if get_task("TASK_HANDLEMENUINPUT").get("isActive", False):
+                                        self.create_fast_reset_snapshot()
                                         context.message = "Waiting for a unique frame before continuing..."
                                         self.update_state(ModeStarterStates.RNG_CHECK)
                                         continue
@@ -129,11 +234,10 @@ class ModeStarters:
                                 self.update_state(ModeStarterStates.OVERWORLD)
                             else:
                                 rng = unpack_uint32(read_symbol("gRngValue"))
-                                if rng in self.rng_history:
+                                if not self.should_play_out(rng):
                                     pass
                                 else:
-                                    self.rng_history.append(rng)
-                                    save_rng_state_history(config["general"]["starter"], self.rng_history)
+                                    self.rng_history.add(rng)
                                     self.update_state(ModeStarterStates.OVERWORLD)
                                     continue
 
@@ -193,6 +297,7 @@ class ModeStarters:
                                 continue
 
                         case ModeStarterStates.LOG_STARTER:
+                            self.calibrate_prediction(get_party()[0])
                             encounter_pokemon(get_party()[0])
                             opponent_changed()  # Prevent opponent from being logged if starter is shiny
                             return
@@ -207,14 +312,19 @@ class ModeStarters:
                             return
 
                         case ModeStarterStates.RESET:
-                            context.emulator.reset()
-                            self.update_state(ModeStarterStates.TITLE)
+                            if self.session.fast_reset_snapshot is not None:
+                                self.restore_fast_reset_snapshot()
+                                self.update_state(ModeStarterStates.OVERWORLD)
+                            else:
+                                context.emulator.reset()
+                                self.update_state(ModeStarterStates.TITLE)
 
                         case ModeStarterStates.TITLE:
                             match get_game_state():
                                 case GameState.TITLE_SCREEN | GameState.MAIN_MENU:
                                     context.emulator.press_button("A")
                                 case GameState.OVERWORLD:
+                                    self.create_fast_reset_snapshot()
                                     self.update_state(ModeStarterStates.OVERWORLD)
                                     continue
 
@@ -244,11 +354,10 @@ class ModeStarters:
                                 self.update_state(ModeStarterStates.CONFIRM_STARTER)
                             else:
                                 rng = unpack_uint32(read_symbol("gRngValue"))
-                                if rng in self.rng_history:
+                                if not self.should_play_out(rng):
                                     pass
                                 else:
-                                    self.rng_history.append(rng)
-                                    save_rng_state_history(config["general"]["starter"], self.rng_history)
+                                    self.rng_history.add(rng)
                                     self.update_state(ModeStarterStates.CONFIRM_STARTER)
                                     continue
 
@@ -282,6 +391,7 @@ class ModeStarters:
 
                         case ModeStarterStates.LOG_STARTER:
                             party = get_party()
+                            self.calibrate_prediction(party[len(party) - 1])
                             encounter_pokemon(party[len(party) - 1])
                             opponent_changed()  # Prevent opponent from being logged if starter is shiny
                             return
@@ -289,8 +399,12 @@ class ModeStarters:
                 case Regions.HOENN_STARTERS:
                     match self.state:
                         case ModeStarterStates.RESET:
-                            context.emulator.reset()
-                            self.update_state(ModeStarterStates.TITLE)
+                            if self.session.fast_reset_snapshot is not None:
+                                self.restore_fast_reset_snapshot()
+                                self.update_state(ModeStarterStates.OVERWORLD)
+                            else:
+                                context.emulator.reset()
+                                self.update_state(ModeStarterStates.TITLE)
 
                         case ModeStarterStates.TITLE:
                             game_state = get_game_state()
@@ -299,6 +413,7 @@ class ModeStarters:
                                     context.emulator.press_button("A")
                                 case GameState.OVERWORLD:  # TODO assumes trainer is on Route 101, facing bag
                                     if get_task(self.task_map_popup):
+                                        self.create_fast_reset_snapshot()
                                         self.update_state(ModeStarterStates.OVERWORLD)
                                         continue
 
@@ -340,11 +455,10 @@ class ModeStarters:
                                 self.update_state(ModeStarterStates.CONFIRM_STARTER)
                             else:
                                 rng = unpack_uint32(read_symbol("gRngValue"))
-                                if rng in self.rng_history:
+                                if not self.should_play_out(rng):
                                     pass
                                 else:
-                                    self.rng_history.append(rng)
-                                    save_rng_state_history(config["general"]["starter"], self.rng_history)
+                                    self.rng_history.add(rng)
                                     self.update_state(ModeStarterStates.CONFIRM_STARTER)
                                     continue
 
@@ -382,6 +496,7 @@ class ModeStarters:
                                 continue
 
                         case ModeStarterStates.LOG_STARTER:
+                            self.calibrate_prediction(get_party()[0])
                             encounter_pokemon(get_party()[0])
                             opponent_changed()  # Prevent opponent from being logged if starter is shiny
                             return
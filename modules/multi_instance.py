@@ -0,0 +1,326 @@
+import multiprocessing
+import queue
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from modules.console import console
+from modules.context import context
+from modules.headless import PokebotHeadless
+from modules.profiles import Profile, load_profile_by_name
+from modules.runtime import get_base_path
+
+if TYPE_CHECKING:
+    from pokebot import StartupSettings
+    from modules.pokemon import Pokemon
+
+# Bot modes in which every attempt is independent of the previous one (i.e. soft-reset hunts.)
+# In other modes, all instances would start from the same save state and thus just see the
+# same encounters in the same order.
+parallel_bot_modes = ["Starters"]
+
+# These are only set inside worker processes.
+_worker_index: int | None = None
+_worker_count: int = 1
+_message_queue: "multiprocessing.Queue | None" = None
+_custom_catch_filters: Callable[["Pokemon"], bool] | None = None
+
+
+def is_worker() -> bool:
+    """
+    :return: Whether this process is a worker that has been started by a multi-instance supervisor.
+    """
+    return _worker_index is not None
+
+
+def forward_encounter(pokemon: "Pokemon") -> None:
+    """
+    Sends an encounter to the supervisor process, which logs it into the profile's stats.
+    :param pokemon: The encountered Pokémon
+    """
+    _message_queue.put(("encounter", _worker_index, pokemon.data))
+
+
+def check_custom_catch_filters(pokemon: "Pokemon") -> bool:
+    """
+    Workers do not have a `TotalStats` instance (stats are only kept by the supervisor), so they use the
+    custom catch filters of the profile they have been started for -- their own profile directory is
+    just `workers/<n>/` inside of it, which does not contain any config.
+
+    :param pokemon: The encountered Pokémon
+    :return: Whether the Pokémon matches the parent profile's custom catch filters
+    """
+    return _custom_catch_filters(pokemon)
+
+
+def owns_rng_seed(rng_value: int) -> bool:
+    """
+    In order for workers not to test the same RNG seeds over and over again, the seed space is
+    split between all workers, and each worker only plays out seeds that belong to its share.
+
+    The upper bits are used for this because the lower bits of an LCG have a very short period.
+
+    :param rng_value: A value of `gRngValue`
+    :return: Whether this process should play out an attempt with this seed. Always True if this
+             is not a worker process.
+    """
+    if _worker_index is None:
+        return True
+    return (rng_value >> 16) % _worker_count == _worker_index
+
+
+def get_worker_path(profile: Profile, worker_index: int) -> Path:
+    return profile.path / "workers" / str(worker_index)
+
+
+# Directories that workers write files into which should end up in the parent profile (Pokémon that
+# have been dumped as `.pk3`, save states, save game backups and screenshots.)
+worker_output_directories = ["pokemon", "states", "saves", "screenshots"]
+
+
+def _move_worker_files_to_profile(profile: Profile, worker_index: int) -> None:
+    """
+    Moves all files that a worker has created in its `pokemon/`, `states/` etc. directories into the
+    respective directories of the parent profile, so that they are not lost when the worker directory
+    is cleared for the next run.
+    """
+    worker_path = get_worker_path(profile, worker_index)
+    for directory_name in worker_output_directories:
+        worker_directory = worker_path / directory_name
+        if not worker_directory.is_dir():
+            continue
+
+        for worker_file in worker_directory.rglob("*"):
+            if not worker_file.is_file():
+                continue
+            target_file = profile.path / directory_name / worker_file.relative_to(worker_directory)
+            if target_file.exists():
+                target_file = target_file.with_stem(f"{target_file.stem}_instance{worker_index}")
+            target_file.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(worker_file, target_file)
+
+
+class PokebotWorker(PokebotHeadless):
+    """
+    Headless runner for a single worker process. Every couple of frames it reports its FPS to the
+    supervisor, checks whether it has been told to stop, and tells the supervisor if it has switched
+    to Manual mode (which means that it found something that needs the user's attention.)
+    """
+
+    def __init__(self, main_loop: callable, stop_event: multiprocessing.Event):
+        super().__init__(main_loop, stats_interval=0)
+        self._stop_event = stop_event
+        self._frame_counter = 0
+        self._last_status_time = 0.0
+        self._reported_manual_mode = False
+
+    def _on_frame(self) -> None:
+        self._frame_counter += 1
+        if self._frame_counter % 60 != 0:
+            return
+
+        if self._stop_event.is_set():
+            sys.exit(0)
+
+        if context.bot_mode == "Manual" and not self._reported_manual_mode:
+            self._reported_manual_mode = True
+            _message_queue.put(("manual", _worker_index, context.message))
+
+        now = time.time()
+        if now - self._last_status_time >= 1:
+            self._last_status_time = now
+            _message_queue.put(("status", _worker_index, context.emulator.get_current_fps()))
+
+
+def _prepare_worker_directory(profile: Profile, worker_index: int) -> None:
+    """
+    Every worker gets its own copy of the profile's save game, save state and RNG history, so
+    that workers do not write into each other's files.
+    """
+    worker_path = get_worker_path(profile, worker_index)
+    if worker_path.exists():
+        # In case a previous run has been aborted before it could clean up after itself.
+        _move_worker_files_to_profile(profile, worker_index)
+        shutil.rmtree(worker_path)
+    worker_path.mkdir(parents=True)
+
+    for file_name in ["current_save.sav", "current_state.ss1"]:
+        if (profile.path / file_name).is_file():
+            shutil.copyfile(profile.path / file_name, worker_path / file_name)
+
+    if (profile.path / "rng").is_dir():
+        shutil.copytree(profile.path / "rng", worker_path / "rng")
+
+
+def _merge_rng_histories(profile: Profile, worker_count: int) -> None:
+    """
+    Adds the RNG states that have been used by the workers to the profile's RNG history, so that the next run
+    (with one or multiple instances) does not try them again.
+    """
+    from modules.files import RngStateHistory
+
+    for worker_index in range(worker_count):
+        worker_rng_directory = get_worker_path(profile, worker_index) / "rng"
+        if worker_rng_directory.is_dir():
+            for worker_history_file in worker_rng_directory.glob("*.bin"):
+                history = RngStateHistory(profile.path / "rng" / worker_history_file.name)
+                worker_history = RngStateHistory(worker_history_file)
+                history.update(list(worker_history))
+                worker_history.close()
+                history.close()
+
+
+def _run_worker(
+    profile_name: str,
+    worker_index: int,
+    worker_count: int,
+    startup_settings: "StartupSettings",
+    message_queue: multiprocessing.Queue,
+    stop_event: multiprocessing.Event,
+) -> None:
+    global _worker_index, _worker_count, _message_queue, _custom_catch_filters
+
+    from modules.catch_filters import load_custom_catch_filters
+    from modules.config import config, load_config_from_directory
+    from modules.main import main_loop
+
+    _worker_index = worker_index
+    _worker_count = worker_count
+    _message_queue = message_queue
+
+    parent_profile = load_profile_by_name(profile_name)
+    load_config_from_directory(get_base_path() / "profiles")
+    load_config_from_directory(parent_profile.path, allow_missing_files=True)
+    _custom_catch_filters = load_custom_catch_filters(parent_profile.path)
+
+    # Only the supervisor should talk to the outside world, otherwise all the workers would try
+    # to bind to the same port.
+    config["obs"]["http_server"]["enable"] = False
+    config["discord"]["rich_presence"] = False
+
+    worker_profile = Profile(parent_profile.rom, get_worker_path(parent_profile, worker_index), None)
+    startup_settings.profile = worker_profile
+    PokebotWorker(main_loop, stop_event).run(startup_settings)
+
+
+def run_multi_instance(startup_settings: "StartupSettings", instance_count: int) -> None:
+    """
+    Runs `instance_count` headless bot instances of the same profile in separate processes and
+    merges all of their encounters into the profile's stats.
+
+    As soon as one of the workers switches to Manual mode (because it found a shiny or a Pokémon
+    matching the custom catch filters), all workers are stopped and the save state of that worker
+    is copied back into the profile so that it will be loaded the next time the profile is started.
+
+    :param startup_settings: Settings from the command line
+    :param instance_count: Number of worker processes to start
+    """
+    from modules.config import catch_block_schema, load_config, load_config_from_directory
+    from modules.game import set_rom
+
+    profile = startup_settings.profile
+    if profile is None:
+        console.print("[bold red]Running multiple instances requires a profile name to be passed as an argument.[/]")
+        return
+
+    if startup_settings.bot_mode not in parallel_bot_modes:
+        console.print(
+            f"[bold red]Bot mode `{startup_settings.bot_mode}` cannot be run in multiple instances. "
+            f"Supported modes are: {', '.join(parallel_bot_modes)}[/]"
+        )
+        return
+
+    context.profile = profile
+    set_rom(profile.rom)
+    load_config_from_directory(profile.path, allow_missing_files=True)
+
+    from modules.pokemon import Pokemon
+    # Importing this creates the `TotalStats` instance, which needs the profile to be loaded first.
+    from modules.stats import total_stats
+
+    block_list = load_config("catch_block.yml", catch_block_schema)["block_list"]
+
+    # libmgba's state must never be shared between processes, so `spawn` is used on all platforms.
+    mp_context = multiprocessing.get_context("spawn")
+    message_queue = mp_context.Queue()
+    stop_event = mp_context.Event()
+
+    workers = []
+    for worker_index in range(instance_count):
+        _prepare_worker_directory(profile, worker_index)
+        worker = mp_context.Process(
+            target=_run_worker,
+            args=(profile.path.name, worker_index, instance_count, startup_settings, message_queue, stop_event),
+            name=f"pokebot-worker-{worker_index}",
+        )
+        worker.start()
+        workers.append(worker)
+
+    console.print(f"Started [cyan]{instance_count}[/] instances of [cyan]{profile.path.name}[/]")
+
+    worker_fps: dict[int, int] = {}
+    found_by: int | None = None
+    last_report_time = time.time()
+
+    def handle_message(message: tuple) -> None:
+        nonlocal found_by, block_list
+
+        match message:
+            case ("encounter", _, data):
+                pokemon = Pokemon(data)
+                if pokemon.is_shiny:
+                    block_list = load_config("catch_block.yml", catch_block_schema)["block_list"]
+                total_stats.log_encounter(pokemon, block_list)
+
+            case ("status", worker_index, current_fps):
+                worker_fps[worker_index] = current_fps
+
+            case ("manual", worker_index, reason):
+                if found_by is None:
+                    found_by = worker_index
+                    console.print(f"[bold yellow]Instance #{worker_index} switched to Manual mode:[/] {reason}")
+                    console.print("[yellow]Stopping all instances...[/]")
+                    stop_event.set()
+
+    try:
+        while any(worker.is_alive() for worker in workers):
+            try:
+                handle_message(message_queue.get(timeout=1))
+            except queue.Empty:
+                pass
+
+            if time.time() - last_report_time >= 30:
+                last_report_time = time.time()
+                total_fps = sum(worker_fps.values())
+                console.print(
+                    f"[grey50]{total_fps:,}fps ({total_fps / 59.73:0.2f}x) across {len(worker_fps)} instances | "
+                    f"{total_stats.get_encounter_rate():,}/h | "
+                    f"{total_stats.session_encounters:,} encounters this session[/]"
+                )
+    except KeyboardInterrupt:
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+
+    # Workers might have put encounters into the queue right before exiting.
+    while True:
+        try:
+            handle_message(message_queue.get_nowait())
+        except queue.Empty:
+            break
+
+    _merge_rng_histories(profile, instance_count)
+    for worker_index in range(instance_count):
+        _move_worker_files_to_profile(profile, worker_index)
+
+    if found_by is not None:
+        worker_state = get_worker_path(profile, found_by) / "current_state.ss1"
+        if worker_state.is_file():
+            states_directory = profile.path / "states"
+            states_directory.mkdir(exist_ok=True)
+            backup_path = states_directory / time.strftime(f"%Y-%m-%d_%H-%M-%S_instance{found_by}.ss1")
+            shutil.copyfile(worker_state, backup_path)
+            shutil.copyfile(worker_state, profile.path / "current_state.ss1")
+            console.print(f"Copied the save state of instance #{found_by} to `current_state.ss1`!")
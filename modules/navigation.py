@@ -30,9 +30,10 @@ def follow_path(coords: list, run: bool = True) -> bool:  # TODO needs a rework
             if context.emulator.get_frame_count() % 60 == 0 and get_task("TASK_SPINPOKENAVICON").get("isActive", False):
                 context.emulator.release_button("B")
 
-                while get_task("TASK_SPINPOKENAVICON").get("isActive", False):
-                    context.emulator.press_button("B")
-                    context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
+                # TODO bad (needs to be refactored so main loop advances frame)
+                context.emulator.run_frames(
+                    None, until=lambda: not get_task("TASK_SPINPOKENAVICON").get("isActive", False), inputs="B"
+                )
 
             trainer_coords = trainer.get_coords()
             # Check if map changed to desired map
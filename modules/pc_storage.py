@@ -33,7 +33,7 @@ def import_into_storage(data: bytes) -> bool:
         # first mon is stored at offset gPokemonStorage + 4
         offset_to_check = 4 + i * 80
         # if a spot is space_available, it is all 0
-        space_available = unpack_uint32(context.emulator.read_bytes(g_pokemon_storage + offset_to_check, 4)) == 0
+        space_available = context.emulator.read_uint32(g_pokemon_storage + offset_to_check) == 0
         if space_available:
             available_offset = offset_to_check
             break
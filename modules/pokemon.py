@@ -11,7 +11,7 @@ import numpy
 
 from modules.context import context
 from modules.game import decode_string
-from modules.memory import unpack_uint32, unpack_uint16, read_symbol, pack_uint32
+from modules.memory import SymbolHandle, unpack_uint32, unpack_uint16, read_symbol, pack_uint32, watch_symbol
 from modules.roms import ROMLanguage
 from modules.runtime import get_data_path
 
@@ -1182,7 +1182,7 @@ class Pokemon:
 
         This is not meant to be used in new code unless truly necessary. It is mainly here so
         we can continue to provide external consumers with the same data structures as before
-        (it is currently being used for the WebServer and for `shiny_log.json`.)
+        (it is currently being used for the WebServer and for `shiny_log.jsonl`.)
 
         :return: A legacy-format dictionary containing data about this Pokemon
         """
@@ -1502,8 +1502,18 @@ def get_opponent() -> Pokemon:
     return mon
 
 
+_gEnemyParty = SymbolHandle("gEnemyParty")
 last_opid = pack_uint32(0)  # ReadSymbol('gEnemyParty', size=4)
 
+# The opponent's PID is only compared after a memory watch has noticed that it has been written to.
+_opponent_pid_watch_emulator = None
+_opponent_pid_written = True
+
+
+def _on_opponent_pid_written(previous_value: bytes, current_value: bytes) -> None:
+    global _opponent_pid_written
+    _opponent_pid_written = True
+
 
 def opponent_changed() -> bool:
     """
@@ -1513,8 +1523,17 @@ def opponent_changed() -> bool:
     :return: True if opponent changed, otherwise False (bool)
     """
     try:
-        global last_opid
-        opponent_pid = read_symbol("gEnemyParty", size=4)
+        global last_opid, _opponent_pid_watch_emulator, _opponent_pid_written
+        if _opponent_pid_watch_emulator is not context.emulator:
+            watch_symbol("gEnemyParty", _on_opponent_pid_written, size=4)
+            _opponent_pid_watch_emulator = context.emulator
+            _opponent_pid_written = True
+
+        if not _opponent_pid_written:
+            return False
+        _opponent_pid_written = False
+
+        opponent_pid = _gEnemyParty.read(size=4)
         if opponent_pid != last_opid and opponent_pid != b"\x00\x00\x00\x00":
             last_opid = opponent_pid
             return True
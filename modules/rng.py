@@ -0,0 +1,150 @@
+from enum import Enum
+from functools import lru_cache
+
+import numpy
+
+# Gen3 games use a linear congruential generator for their RNG:
+#   seed = seed * 0x41C64E6D + 0x6073 (mod 2^32)
+# Each call to `Random()` advances the seed once and returns its upper 16 bits.
+# See https://bulbapedia.bulbagarden.net/wiki/Pseudorandom_number_generation_in_Pok%C3%A9mon
+LCG_MULTIPLIER = 0x41C64E6D
+LCG_INCREMENT = 0x6073
+
+
+class GenerationMethod(Enum):
+    """
+    The order in which `Random()` calls are used for a Pokémon's PID and IVs. Method 1 is what `CreateMon()` does,
+    and is used for starters, gift and static encounters. Methods 2 and 4 have an unrelated RNG call in between,
+    which only happens in some wild encounters.
+    See https://www.smogon.com/ingame/rng/pid_iv_creation
+    """
+
+    METHOD_1 = (0, 1, 2, 3)
+    METHOD_2 = (0, 1, 3, 4)
+    METHOD_4 = (0, 1, 2, 4)
+
+
+prediction_dtype = numpy.dtype(
+    [
+        ("advance", numpy.uint32),
+        ("pid", numpy.uint32),
+        ("hp", numpy.uint8),
+        ("attack", numpy.uint8),
+        ("defence", numpy.uint8),
+        ("speed", numpy.uint8),
+        ("special_attack", numpy.uint8),
+        ("special_defence", numpy.uint8),
+        ("nature", numpy.uint8),
+        ("shiny", numpy.bool_),
+    ]
+)
+
+
+def advance_rng(seed: int, advances: int = 1) -> int:
+    """
+    Calculates what the RNG seed will be after `advances` calls to `Random()`. This takes
+    O(log n) steps, so it is fine to use with large numbers of advances.
+
+    :param seed: Current value of `gRngValue`
+    :param advances: Number of times the RNG should be advanced
+    :return: The new RNG seed
+    """
+    multiplier, increment = LCG_MULTIPLIER, LCG_INCREMENT
+    total_multiplier, total_increment = 1, 0
+    while advances > 0:
+        if advances & 1:
+            total_multiplier = (total_multiplier * multiplier) & 0xFFFFFFFF
+            total_increment = (total_increment * multiplier + increment) & 0xFFFFFFFF
+        increment = (increment * (multiplier + 1)) & 0xFFFFFFFF
+        multiplier = (multiplier * multiplier) & 0xFFFFFFFF
+        advances >>= 1
+    return (seed * total_multiplier + total_increment) & 0xFFFFFFFF
+
+
+@lru_cache(maxsize=4)
+def _get_jump_table(length: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    For every n in 1..length, the seed after n advances is `multipliers[n - 1] * seed + increments[n - 1]`.
+    Having this table makes it possible to calculate a whole sequence of seeds at once.
+    """
+    multipliers = numpy.cumprod(numpy.full(length, LCG_MULTIPLIER, dtype=numpy.uint32), dtype=numpy.uint32)
+    powers = numpy.concatenate((numpy.ones(1, dtype=numpy.uint32), multipliers[:-1]))
+    increments = numpy.cumsum(powers, dtype=numpy.uint32) * numpy.uint32(LCG_INCREMENT)
+    multipliers.flags.writeable = False
+    increments.flags.writeable = False
+    return multipliers, increments
+
+
+def get_rng_sequence(seed: int, length: int) -> numpy.ndarray:
+    """
+    :param seed: Current value of `gRngValue`
+    :param length: Number of RNG advances to calculate
+    :return: The seeds after 1, 2, ..., `length` advances
+    """
+    multipliers, increments = _get_jump_table(length)
+    return multipliers * numpy.uint32(seed) + increments
+
+
+def predict_pokemon(
+    seed: int,
+    tid: int,
+    sid: int,
+    count: int,
+    first_advance: int = 0,
+    method: GenerationMethod = GenerationMethod.METHOD_1,
+) -> numpy.ndarray:
+    """
+    Predicts which Pokémon would be generated if the game started generating one after a given number
+    of RNG advances, for `count` consecutive numbers of advances.
+
+    :param seed: Current value of `gRngValue`
+    :param tid: Trainer ID of the player
+    :param sid: Secret ID of the player
+    :param count: Number of consecutive advances to make predictions for
+    :param first_advance: Number of RNG advances before the first prediction
+    :param method: Order of RNG calls used to generate the Pokémon
+    :return: A structured array with `prediction_dtype`, one entry per number of advances
+    """
+    pid_low_call, pid_high_call, iv1_call, iv2_call = method.value
+    random_values = get_rng_sequence(advance_rng(seed, first_advance), count + iv2_call) >> 16
+
+    pid_low = random_values[pid_low_call : pid_low_call + count]
+    pid_high = random_values[pid_high_call : pid_high_call + count]
+    iv1 = random_values[iv1_call : iv1_call + count]
+    iv2 = random_values[iv2_call : iv2_call + count]
+
+    result = numpy.empty(count, dtype=prediction_dtype)
+    result["advance"] = numpy.arange(first_advance, first_advance + count, dtype=numpy.uint32)
+    result["pid"] = (pid_high << 16) | pid_low
+    result["hp"] = iv1 & 0x1F
+    result["attack"] = (iv1 >> 5) & 0x1F
+    result["defence"] = (iv1 >> 10) & 0x1F
+    result["speed"] = iv2 & 0x1F
+    result["special_attack"] = (iv2 >> 5) & 0x1F
+    result["special_defence"] = (iv2 >> 10) & 0x1F
+    result["nature"] = result["pid"] % 25
+    result["shiny"] = (pid_low ^ pid_high ^ numpy.uint32(tid ^ sid)) < 8
+    return result
+
+
+def find_pid_advance(
+    seed: int,
+    pid: int,
+    max_advances: int,
+    method: GenerationMethod = GenerationMethod.METHOD_1,
+) -> int | None:
+    """
+    Finds out after how many RNG advances a Pokémon with a given PID has been generated.
+
+    :param seed: Value of `gRngValue` at some point before the Pokémon has been generated
+    :param pid: The generated Pokémon's PID
+    :param max_advances: Maximum number of advances to search
+    :param method: Order of RNG calls used to generate the Pokémon
+    :return: Number of advances between `seed` and the Pokémon being generated, or None if no
+             match has been found
+    """
+    pid_low_call, pid_high_call, _, _ = method.value
+    random_values = get_rng_sequence(seed, max_advances + pid_high_call) >> 16
+    pids = (random_values[pid_high_call : pid_high_call + max_advances] << 16) | random_values[:max_advances]
+    matches = numpy.flatnonzero(pids == numpy.uint32(pid))
+    return int(matches[0]) if len(matches) > 0 else None
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import time
+from typing import Any, Callable, NamedTuple
+
+from modules.context import context
+
+
+class PublishedResource(NamedTuple):
+    version: int
+    etag: str
+    json: bytes
+    # The decoded data; this is shared between all readers and must not be modified.
+    data: Any
+
+
+class StatePublisher:
+    """
+    Collects data from the emulator (party, items, trainer, ...) on the main thread and publishes it as
+    pre-serialised JSON, so that other threads (i.e. the HTTP server) never have to touch the emulator.
+
+    Reading emulator memory from another thread while a frame is being emulated can return inconsistent
+    data, and some reads (`get_party()`) might even need to emulate a frame themselves.
+
+    `update()` is called by the main loop after every frame and re-publishes all sources every
+    `publish_interval_frames` frames, but at most every `min_publish_interval` seconds so that this
+    does not cost too much when running at unthrottled speed. A resource's version (and ETag) only
+    changes if its data has actually changed.
+    """
+
+    publish_interval_frames: int = 30
+    min_publish_interval: float = 0.5
+
+    def __init__(self):
+        self._sources: dict[str, Callable[[], Any]] = {}
+        self._resources: dict[str, PublishedResource] = {}
+        self._last_publish_frame: int = 0
+        self._last_publish_time: float = 0
+
+    def add_source(self, name: str, source: Callable[[], Any]) -> None:
+        """
+        :param name: Name under which the data will be published
+        :param source: Function that returns the (JSON-serialisable) data; this is called on the main thread
+        """
+        # Replacing the dict rather than modifying it, since `publish()` might be iterating over it right now.
+        self._sources = self._sources | {name: source}
+
+    def update(self) -> None:
+        if len(self._sources) == 0:
+            return
+
+        # The frame count goes backwards whenever the emulator is reset or a save state/snapshot is restored,
+        # in which case the data should be re-published rather than waiting for the count to catch up.
+        frames_since_last_publish = context.emulator.get_frame_count() - self._last_publish_frame
+        if 0 <= frames_since_last_publish < self.publish_interval_frames:
+            return
+        if time.time() - self._last_publish_time < self.min_publish_interval:
+            return
+
+        self.publish()
+
+    def publish(self) -> None:
+        resources = dict(self._resources)
+        for name, source in self._sources.items():
+            try:
+                data = source()
+                encoded_data = json.dumps(data).encode("utf-8")
+            except Exception:
+                # Some data cannot be read at all times (e.g. before the game has been loaded), in which
+                # case the previous version stays published.
+                continue
+
+            previous = resources.get(name)
+            if previous is None or previous.json != encoded_data:
+                resources[name] = PublishedResource(
+                    version=previous.version + 1 if previous is not None else 1,
+                    etag=hashlib.sha1(encoded_data).hexdigest(),
+                    json=encoded_data,
+                    data=data,
+                )
+
+        # Replacing the whole dict means that readers always see a consistent set of resources.
+        self._resources = resources
+        self._last_publish_frame = context.emulator.get_frame_count()
+        self._last_publish_time = time.time()
+
+    def get(self, name: str) -> PublishedResource | None:
+        """
+        :param name: Name of the resource
+        :return: The most recently published version of the resource, or None if it has not been published yet
+        """
+        return self._resources.get(name)
+
+
+state_publisher = StatePublisher()
@@ -1,22 +1,136 @@
-import copy
+import atexit
 import json
 import math
 import sys
 import time
 import importlib
-from threading import Thread
+from bisect import bisect_left
+from pathlib import Path
+from threading import Lock, RLock, Thread
 from datetime import datetime
+from typing import Iterator
 
+from modules.catch_filters import load_custom_catch_filters
 from modules.config import config
 from modules.console import console, print_stats
 from modules.context import context
-from modules.csv import log_encounter_to_csv
+from modules.csv import EncounterCsvWriter
+from modules.encounter_database import EncounterDatabase
+from modules.event_stream import event_stream
 from modules.files import read_file, write_file
+from modules.hooks import HookExecutor
 from modules.memory import get_game_state, GameState
 from modules.pokemon import Pokemon
 
 
+class ShinyLog:
+    """
+    All shiny encounters, stored in `stats/shiny_log.jsonl` with one JSON object per line.
+
+    New entries are just appended to that file, so logging a shiny does not get any slower the more
+    shinies have been logged. The byte offset and encounter time of every entry is kept in memory,
+    which makes it possible to read any range of entries (or all entries since a point in time)
+    without parsing the whole file.
+    """
+
+    def __init__(self, file: Path):
+        self._file = file
+        self._offsets: list[int] = []
+        self._times: list[float] = []
+        self._lock = Lock()
+
+        if self._file.is_file():
+            offset = 0
+            with open(self._file, "rb") as file_handle:
+                for line in file_handle:
+                    # The last entry might only have been partially written if the bot crashed at the wrong time.
+                    if not line.endswith(b"\n"):
+                        break
+                    self._offsets.append(offset)
+                    self._times.append(json.loads(line)["time_encountered"])
+                    offset += len(line)
+            self._end_offset = offset
+        else:
+            self._end_offset = 0
+
+        self._file_handle = open(self._file, "ab", buffering=0)
+        if self._file_handle.tell() != self._end_offset:
+            self._file_handle.truncate(self._end_offset)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, entry: dict) -> None:
+        line = (json.dumps(entry, sort_keys=True) + "\n").encode("utf-8")
+        with self._lock:
+            self._file_handle.write(line)
+            # The offset is only recorded after the entry has been written, so readers never see half an entry.
+            self._offsets.append(self._end_offset)
+            self._times.append(entry["time_encountered"])
+            self._end_offset += len(line)
+
+    def get_index_since(self, timestamp: float) -> int:
+        """
+        :param timestamp: Unix timestamp
+        :return: Index of the first entry that has been encountered at or after `timestamp`
+        """
+        return bisect_left(self._times, timestamp)
+
+    def read_raw(self, start: int = 0, stop: int | None = None) -> Iterator[bytes]:
+        """
+        :param start: Index of the first entry to read
+        :param stop: Index after the last entry to read, or None to read until the end
+        :return: The JSON-encoded entries (without a trailing newline)
+        """
+        with self._lock:
+            offsets = self._offsets[start:stop]
+            end_offset = self._offsets[stop] if stop is not None and stop < len(self._offsets) else self._end_offset
+        if len(offsets) == 0:
+            return
+
+        with open(self._file, "rb") as file_handle:
+            file_handle.seek(offsets[0])
+            data = file_handle.read(end_offset - offsets[0])
+        for line in data.splitlines():
+            yield line
+
+    def read(self, start: int = 0, stop: int | None = None) -> list[dict]:
+        return [json.loads(line) for line in self.read_raw(start, stop)]
+
+
+def get_shiny_log(stats_directory: Path) -> ShinyLog:
+    shiny_log = ShinyLog(stats_directory / "shiny_log.jsonl")
+
+    # Previous versions of the bot stored the log as one big JSON file.
+    legacy_file = stats_directory / "shiny_log.json"
+    if legacy_file.is_file():
+        try:
+            if len(shiny_log) == 0:
+                for entry in json.loads(read_file(legacy_file))["shiny_log"]:
+                    shiny_log.append(entry)
+            legacy_file.rename(stats_directory / "shiny_log.json.old")
+        except (ValueError, TypeError, KeyError, OSError):
+            pass
+
+    return shiny_log
+
+
+def copy_stats(stats: dict) -> dict:
+    """
+    :param stats: Stats in the format of `totals.json` (i.e. `TotalStats.total_stats`)
+    :return: A copy of the stats that does not share any (mutable) objects with the original
+    """
+    return {
+        "totals": dict(stats.get("totals", {})),
+        "pokemon": {species_name: dict(entry) for species_name, entry in stats.get("pokemon", {}).items()},
+    }
+
+
 class TotalStats:
+    # `totals.json` is only written every n seconds by a background thread (and when a shiny is found or the
+    # bot exits), in between all changes are appended to `totals_journal.jsonl` -- see `save_encounter_to_journal()`
+    totals_export_interval: int = 60
+
     def __init__(self):
         self.session_encounters: int = 0
         self.session_pokemon: list = []
@@ -32,18 +146,11 @@ class TotalStats:
                 self.stats_dir_path.mkdir()
 
             self.files = {
-                "shiny_log": self.stats_dir_path / "shiny_log.json",
                 "totals": self.stats_dir_path / "totals.json",
+                "totals_journal": self.stats_dir_path / "totals_journal.jsonl",
             }
 
-            if (self.config_dir_path / "customcatchfilters.py").is_file():
-                self.custom_catch_filters = importlib.import_module(
-                    ".customcatchfilters", f"profiles.{context.profile.path.name}"
-                ).custom_catch_filters
-            else:
-                from profiles.customcatchfilters import custom_catch_filters
-
-                self.custom_catch_filters = custom_catch_filters
+            self.custom_catch_filters = load_custom_catch_filters(self.config_dir_path)
 
             if (self.config_dir_path / "customhooks.py").is_file():
                 self.custom_hooks = importlib.import_module(
@@ -56,14 +163,100 @@ class TotalStats:
 
             f_total_stats = read_file(self.files["totals"])
             self.total_stats = json.loads(f_total_stats) if f_total_stats else {}
+            self.journal = open(self.files["totals_journal"], "a", encoding="utf-8")
+            # Held while stats are being changed or written, so `totals.json` is never written halfway through
+            # logging an encounter.
+            self._totals_lock = RLock()
+            self.last_totals_export: float = time.time()
+            self.unsaved_journal_entries: int = 0
+            if self.replay_journal() > 0:
+                self.save_totals()
+            atexit.register(self.save_totals)
+            Thread(target=self._export_totals_periodically, name="TotalsExport", daemon=True).start()
+
+            self.encounter_database = EncounterDatabase(self.stats_dir_path / "encounters.db")
+            atexit.register(self.encounter_database.close)
+
+            self.csv_writer = EncounterCsvWriter(self.stats_dir_path)
+            atexit.register(self.csv_writer.close)
+
+            hook_config = config["logging"].get("custom_hooks", {})
+            self.hook_executor = HookExecutor(
+                self._run_custom_hooks,
+                workers=hook_config.get("workers", 1),
+                queue_size=hook_config.get("queue_size", 100),
+                overflow=hook_config.get("overflow", "coalesce"),
+            )
+            atexit.register(self.hook_executor.wait_until_idle, 10)
 
-            f_shiny_log = read_file(self.files["shiny_log"])
-            self.shiny_log = json.loads(f_shiny_log) if f_shiny_log else {"shiny_log": []}
+            self.shiny_log = get_shiny_log(self.stats_dir_path)
         except SystemExit:
             raise
         except:
             sys.exit(1)
 
+    def replay_journal(self) -> int:
+        """
+        Applies all changes that have been made since `totals.json` has last been written. Journal entries
+        contain the complete new values of everything that changed, so replaying an entry that is already
+        part of `totals.json` does not do any harm.
+
+        :return: Number of journal entries that have been replayed
+        """
+        f_journal = read_file(self.files["totals_journal"])
+        if not f_journal:
+            return 0
+
+        replayed_entries = 0
+        for line in f_journal.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line might be incomplete if the bot crashed while writing it.
+                continue
+            self.total_stats["totals"] = entry["totals"]
+            self.total_stats.setdefault("pokemon", {}).update(entry["pokemon"])
+            replayed_entries += 1
+
+        return replayed_entries
+
+    def save_encounter_to_journal(self, pokemon: Pokemon) -> None:
+        """
+        Appends everything that has been changed by an encounter to the journal, which is a lot cheaper
+        than writing the whole `totals.json` file every time. Only the totals and the stats of the encountered
+        species can change, except for when the phase ends -- in which case `totals.json` is written instead.
+        """
+        entry = {
+            "totals": self.total_stats["totals"],
+            "pokemon": {pokemon.species.name: self.total_stats["pokemon"][pokemon.species.name]},
+        }
+        self.journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.journal.flush()
+        self.unsaved_journal_entries += 1
+
+    def save_totals(self) -> None:
+        """
+        Writes `totals.json` and empties the journal.
+        """
+        with self._totals_lock:
+            if write_file(self.files["totals"], json.dumps(self.total_stats, indent=4, sort_keys=True)):
+                self.journal.truncate(0)
+                self.last_totals_export = time.time()
+                self.unsaved_journal_entries = 0
+
+    def _export_totals_periodically(self) -> None:
+        """
+        Runs in a background thread and writes `totals.json` every `totals_export_interval` seconds if anything
+        has been written to the journal since, so the file is never more than that out of date -- even if there
+        are no more encounters for a while.
+        """
+        while True:
+            time.sleep(max(1.0, self.last_totals_export + self.totals_export_interval - time.time()))
+            with self._totals_lock:
+                overdue = time.time() - self.last_totals_export >= self.totals_export_interval
+                if overdue and self.unsaved_journal_entries > 0:
+                    self.save_totals()
+
     def append_encounter_timestamps(self) -> None:
         self.encounter_timestamps.append(time.time())
         if len(self.encounter_timestamps) > 100:
@@ -75,17 +268,54 @@ class TotalStats:
             self.encounter_log = self.encounter_log[-10:]
 
     def append_shiny_log(self, pokemon: Pokemon) -> None:
-        self.shiny_log["shiny_log"].append(self.get_log_obj(pokemon))
-        write_file(self.files["shiny_log"], json.dumps(self.shiny_log, indent=4, sort_keys=True))
+        self.shiny_log.append(self.get_log_obj(pokemon))
 
     def get_total_stats(self) -> dict:
         return self.total_stats
 
+    def get_total_stats_snapshot(self) -> dict:
+        """
+        Returns a copy of the current stats. It is not affected by encounters that are logged afterwards, and
+        changing it does not affect the bot's stats either. This can be called from any thread.
+
+        :return: Copy of `total_stats`
+        """
+        return copy_stats(self._get_shared_stats_snapshot())
+
+    def _get_shared_stats_snapshot(self) -> dict:
+        """
+        Cheap version of `get_total_stats_snapshot()` that only copies the list of species. The totals and the
+        entries for each species are shared with `total_stats`, which works because these are never modified in
+        place once a snapshot could have been taken of them: `detach_stats_from_snapshots()` replaces them with
+        copies before they are updated.
+
+        This means that the result must not be modified or handed to any code outside of this class -- use
+        `copy_stats()` on it first. That can happen on another thread though, so that the main thread does not
+        need to copy the entries for every single species after every encounter.
+        """
+        return {"totals": self.total_stats.get("totals", {}), "pokemon": dict(self.total_stats.get("pokemon", {}))}
+
+    def detach_stats_from_snapshots(self, species_name: str) -> None:
+        """
+        Replaces the totals and the entry for a species with copies of themselves, so that they can be
+        updated without affecting any snapshots that have been taken by `_get_shared_stats_snapshot()`.
+
+        :param species_name: Name of the species whose stats are about to be updated
+        """
+        self.total_stats["totals"] = dict(self.total_stats["totals"])
+        self.total_stats["pokemon"][species_name] = dict(self.total_stats["pokemon"][species_name])
+
+    def _run_custom_hooks(self, hook: tuple) -> None:
+        # This is called on one of the hook executor's threads, so the stats are copied here rather than
+        # when the encounter is logged.
+        pokemon, stats, block_list = hook
+        self.custom_hooks((pokemon, copy_stats(stats), block_list))
+
     def get_encounter_log(self) -> list:
         return self.encounter_log
 
     def get_shiny_log(self) -> list:
-        return self.shiny_log["shiny_log"]
+        return self.shiny_log.read()
 
     def get_encounter_rate(self) -> int:
         if len(self.encounter_timestamps) > 1 and self.session_encounters > 1:
@@ -167,6 +397,7 @@ class TotalStats:
 
         # Reset Pokémon phase stats
         for n in self.total_stats["pokemon"]:
+            self.total_stats["pokemon"][n] = dict(self.total_stats["pokemon"][n])
             self.total_stats["pokemon"][n].pop("phase_encounters", None)
             self.total_stats["pokemon"][n].pop("phase_highest_sv", None)
             self.total_stats["pokemon"][n].pop("phase_lowest_sv", None)
@@ -303,56 +534,79 @@ class TotalStats:
         }
 
     def log_encounter(self, pokemon: Pokemon, block_list: list) -> None:
-        if "pokemon" not in self.total_stats:
-            self.total_stats["pokemon"] = {}
-        if "totals" not in self.total_stats:
-            self.total_stats["totals"] = {}
-
-        if not pokemon.species.name in self.total_stats["pokemon"]:  # Set up a Pokémon stats if first encounter
-            self.total_stats["pokemon"].update({pokemon.species.name: {}})
-
-        self.update_incremental_stats(pokemon)
-        self.update_sv_records(pokemon)
-        self.update_iv_records(pokemon)
-
-        if config["logging"]["log_encounters"]:
-            log_encounter_to_csv(self.total_stats, pokemon.to_dict(), self.stats_dir_path)
-
-        self.update_shiny_averages(pokemon)
-        self.append_encounter_timestamps()
-        self.append_encounter_log(pokemon)
-        self.update_same_pokemon_streak_record(pokemon)
-
-        if pokemon.is_shiny:
-            self.append_shiny_log(pokemon)
-            self.update_shiny_incremental_stats(pokemon)
-
-            #  TODO fix all this OBS crap
-            for i in range(config["obs"].get("shiny_delay", 1)):
-                context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
+        with self._totals_lock:
+            if "pokemon" not in self.total_stats:
+                self.total_stats["pokemon"] = {}
+            if "totals" not in self.total_stats:
+                self.total_stats["totals"] = {}
+
+            if not pokemon.species.name in self.total_stats["pokemon"]:  # Set up a Pokémon stats if first encounter
+                self.total_stats["pokemon"].update({pokemon.species.name: {}})
+
+            self.detach_stats_from_snapshots(pokemon.species.name)
+            self.update_incremental_stats(pokemon)
+            self.update_sv_records(pokemon)
+            self.update_iv_records(pokemon)
+
+            self.encounter_database.add_encounter(pokemon, self.total_stats["totals"].get("shiny_encounters", 0))
+
+            if config["logging"]["log_encounters"]:
+                self.csv_writer.write(pokemon.to_dict(), self.total_stats["totals"].get("shiny_encounters", 0))
+
+            self.update_shiny_averages(pokemon)
+            self.append_encounter_timestamps()
+            self.append_encounter_log(pokemon)
+            self.update_same_pokemon_streak_record(pokemon)
+            event_stream.publish("encounter", self.encounter_log[-1])
+
+            if pokemon.is_shiny:
+                self.append_shiny_log(pokemon)
+                event_stream.publish("shiny", self.encounter_log[-1])
+                self.update_shiny_incremental_stats(pokemon)
+
+                #  TODO fix all this OBS crap
+                # (There is no emulator in the supervisor process when running multiple instances.)
+                if context.emulator is not None:
+                    # TODO bad (needs to be refactored so main loop advances frame)
+                    context.emulator.run_frames(config["obs"].get("shiny_delay", 1))
+
+                    if config["obs"]["screenshot"]:
+                        from modules.obs import obs_hot_key
+
+                        # Throw out Pokémon for screenshot
+                        context.emulator.run_frames(
+                            None, until=lambda: get_game_state() == GameState.BATTLE, inputs="B"
+                        )
+                        context.emulator.run_frames(180)
+                        obs_hot_key("OBS_KEY_F11", pressCtrl=True)
 
-            if config["obs"]["screenshot"]:
-                from modules.obs import obs_hot_key
+            print_stats(self.total_stats, pokemon, self.session_pokemon, self.get_encounter_rate())
 
-                while get_game_state() != GameState.BATTLE:
-                    context.emulator.press_button("B")  # Throw out Pokémon for screenshot
-                    context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
-                for i in range(180):
-                    context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
-                obs_hot_key("OBS_KEY_F11", pressCtrl=True)
+            # Run custom code in custom_hooks in a background thread
+            hook = (Pokemon(pokemon.data), self._get_shared_stats_snapshot(), tuple(block_list))
+            self.hook_executor.submit(hook, important=pokemon.is_shiny)
 
-        print_stats(self.total_stats, pokemon, self.session_pokemon, self.get_encounter_rate())
+            if pokemon.is_shiny:
+                self.detach_stats_from_snapshots(pokemon.species.name)
+                self.update_phase_records(pokemon)
+                self.reset_phase_stats()
 
-        # Run custom code in custom_hooks in a thread
-        hook = (Pokemon(pokemon.data), copy.deepcopy(self.total_stats), copy.deepcopy(block_list))
-        Thread(target=self.custom_hooks, args=(hook,)).start()
+            # Save stats (`totals.json` is also written periodically by `_export_totals_periodically()`)
+            if pokemon.is_shiny:
+                self.save_totals()
+            else:
+                self.save_encounter_to_journal(pokemon)
 
-        if pokemon.is_shiny:
-            self.update_phase_records(pokemon)
-            self.reset_phase_stats()
 
-        # Save stats file
-        write_file(self.files["totals"], json.dumps(self.total_stats, indent=4, sort_keys=True))
+_total_stats: TotalStats | None = None
 
 
-total_stats = TotalStats()
+def __getattr__(name: str):
+    # The `TotalStats` instance is only created once something imports `total_stats`, so that merely
+    # importing this module does not open the profile's stats files or start any background threads.
+    global _total_stats
+    if name == "total_stats":
+        if _total_stats is None:
+            _total_stats = TotalStats()
+        return _total_stats
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,7 +2,7 @@ from enum import IntEnum, Enum
 
 from modules.game import decode_string
 from modules.context import context
-from modules.memory import get_save_block, read_symbol, unpack_uint16
+from modules.memory import SymbolHandle, get_save_block, unpack_uint16
 from modules.data.map import MapRSE, MapFRLG
 
 
@@ -46,6 +46,11 @@ class FacingDirection(Enum):
     Right = 0x44
 
 
+_gTasks = SymbolHandle("gTasks")
+_gObjectEvents = SymbolHandle("gObjectEvents")
+_gPlayerAvatar = SymbolHandle("gPlayerAvatar")
+
+
 class Trainer:
     def __init__(self):
         if context.rom.game_title in ["POKEMON EMER", "POKEMON RUBY", "POKEMON SAPP"]:
@@ -68,8 +73,10 @@ class Trainer:
         return unpack_uint16(get_save_block(2, 0xC, 2))
 
     def get_map(self) -> tuple:
-        b_gTasks = read_symbol("gTasks", 0x58, 4)
-        return (int(b_gTasks[self.map_offset + 1]), int(b_gTasks[self.map_offset]))
+        return (
+            _gTasks.read_uint8(0x58 + self.map_offset + 1),
+            _gTasks.read_uint8(0x58 + self.map_offset),
+        )
 
     def get_map_name(self) -> str:
         try:
@@ -78,31 +85,25 @@ class Trainer:
             return "UNKNOWN"
 
     def get_coords(self) -> tuple:
-        b_gObjectEvents = read_symbol("gObjectEvents", 16, 3)
-        return (int(b_gObjectEvents[0]) - 7, int(b_gObjectEvents[2]) - 7)
+        return (_gObjectEvents.read_uint8(16) - 7, _gObjectEvents.read_uint8(18) - 7)
 
     def get_on_bike(self) -> bool:
-        b_gPlayerAvatar = read_symbol("gPlayerAvatar", size=1)
         return (
-            int(b_gPlayerAvatar[0])
+            _gPlayerAvatar.read_uint8(0)
             & (AvatarFlags.PLAYER_AVATAR_FLAG_MACH_BIKE | AvatarFlags.PLAYER_AVATAR_FLAG_ACRO_BIKE)
         ) != 0
 
     def get_running_state(self) -> int:
-        b_gPlayerAvatar = read_symbol("gPlayerAvatar", offset=2, size=1)
-        return int(b_gPlayerAvatar[0])
+        return _gPlayerAvatar.read_uint8(2)
 
     def get_tile_transition_state(self) -> int:
-        b_gPlayerAvatar = read_symbol("gPlayerAvatar", offset=3, size=1)
-        return int(b_gPlayerAvatar[0])
+        return _gPlayerAvatar.read_uint8(3)
 
     def get_acro_bike_state(self) -> int:
-        b_gPlayerAvatar = read_symbol("gPlayerAvatar", offset=8, size=1)
-        return int(b_gPlayerAvatar[0])
+        return _gPlayerAvatar.read_uint8(8)
 
     def get_facing_direction(self) -> str:
-        b_gObjectEvents = read_symbol("gObjectEvents", 24, 1)
-        return FacingDirection(int(b_gObjectEvents[0])).name
+        return FacingDirection(_gObjectEvents.read_uint8(24)).name
 
     def to_dict(self) -> dict:
         return {
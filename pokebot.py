@@ -43,6 +43,8 @@ class StartupSettings:
     no_audio: bool
     emulation_speed: int
     always_on_top: bool
+    headless: bool
+    instances: int
 
 
 def parse_arguments() -> StartupSettings:
@@ -66,6 +68,19 @@ def parse_arguments() -> StartupSettings:
         "-t", "--always-on-top", action="store_true", help="Keep the bot window always on top of other windows"
     )
     parser.add_argument("-d", "--debug", action="store_true", help="Enable extra debug options and a debug menu")
+    parser.add_argument(
+        "-hl",
+        "--headless",
+        action="store_true",
+        help="Run without a window and without video output (requires a profile to be passed)",
+    )
+    parser.add_argument(
+        "-i",
+        "--instances",
+        type=int,
+        default=1,
+        help="Run this many headless instances of the profile in parallel (only for soft-reset modes like Starters)",
+    )
     args = parser.parse_args()
 
     preselected_profile: Profile | None = None
@@ -80,6 +95,8 @@ def parse_arguments() -> StartupSettings:
         no_audio=bool(args.no_audio),
         emulation_speed=int(args.emulation_speed or "1"),
         always_on_top=bool(args.always_on_top),
+        headless=bool(args.headless),
+        instances=max(1, args.instances),
     )
 
 
@@ -92,7 +109,6 @@ if __name__ == "__main__":
     from modules.config import load_config_from_directory, available_bot_modes
     from modules.context import context
     from modules.console import console
-    from modules.gui import PokebotGui
     from modules.main import main_loop
     from modules.profiles import Profile, profile_directory_exists, load_profile_by_name
 
@@ -113,6 +129,19 @@ if __name__ == "__main__":
 
     startup_settings = parse_arguments()
     console.print(f"Starting [bold cyan]{pokebot_name} {pokebot_version}![/]")
-    gui = PokebotGui(main_loop, on_exit)
-    context.gui = gui
-    gui.run(startup_settings)
+    if startup_settings.instances > 1:
+        from modules.multi_instance import run_multi_instance
+
+        run_multi_instance(startup_settings, startup_settings.instances)
+    elif startup_settings.headless:
+        # Importing `modules.gui` would load Tkinter, which is not needed (and might not even
+        # be available) when running without a window.
+        from modules.headless import PokebotHeadless
+
+        PokebotHeadless(main_loop).run(startup_settings)
+    else:
+        from modules.gui import PokebotGui
+
+        gui = PokebotGui(main_loop, on_exit)
+        context.gui = gui
+        gui.run(startup_settings)
@@ -18,6 +18,8 @@ def custom_catch_filters(pokemon: Pokemon) -> bool:
     auto-catch is ready
 
     Note: you must restart the bot after editing this file for changes to take effect!
+    Most filters can also be written as rules in `catch_filters.yml` instead, which is faster and is reloaded
+    automatically whenever it is edited. The IV rules that used to be enabled here have moved there.
 
     :param pokemon: Pokémon object of the current encounter
     """
@@ -87,15 +89,15 @@ def custom_catch_filters(pokemon: Pokemon) -> bool:
 
             # Catch perfect IV Pokémon
             if pokemon.ivs.sum() == (6 * 31):
-                return True  # ✅ enabled
+                pass  # ❌ disabled (see `catch_filters.yml`)
 
             # Catch zero IV Pokémon
             if pokemon.ivs.sum() == 0:
-                return True  # ✅ enabled
+                pass  # ❌ disabled (see `catch_filters.yml`)
 
             # Catch Pokémon with 6 identical IVs of any value
             if all(v == ivs[0] for v in ivs):
-                return True  # ✅ enabled
+                pass  # ❌ disabled (see `catch_filters.yml`)
 
             # Catch Pokémon with 4 or more max IVs in any stat
             max_ivs = sum(1 for v in ivs if v == 31)
@@ -16,10 +16,11 @@ def custom_hooks(hook) -> None:
     This function is called every time an encounter is logged, but before phase stats are reset (if shiny)
     this file is useful for custom webhooks or logging to external databases if you understand Python
 
-    Note: this function runs in a thread and will not hold up the bot if you need to run any slow hooks
+    Note: this function runs in a background thread and will not hold up the bot if you need to run any slow hooks
+    (see `custom_hooks` in `logging.yml` for what happens if hooks cannot keep up with the encounters)
     """
     try:
-        # Deep copy of Pokémon and stats dictionaries when the thread was called to avoid main thread overwriting vars
+        # Copies of the Pokémon and of the stats at the time of the encounter
         pokemon: Pokemon = hook[0]
         stats = hook[1]
         block_list = hook[2]
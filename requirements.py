@@ -18,7 +18,6 @@ required_modules = [
     "ruamel.yaml~=0.18.2",
     "pypresence~=4.3.0",
     "obsws-python~=1.6.0",
-    "pandas~=2.1.1",
     "discord-webhook~=1.2.1",
     "jsonschema~=4.17.3",
     "rich~=13.5.2",
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import pytest
+
+from modules.context import context
+from modules.files import get_rng_state_history
+
+
+@pytest.fixture(autouse=True)
+def profile(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(context, "profile", SimpleNamespace(path=tmp_path, rom=None))
+
+
+def test_rng_state_history_is_only_loaded_once():
+    history = get_rng_state_history("Treecko")
+    history.add(0x12345678)
+
+    assert get_rng_state_history("Treecko") is history
+    assert get_rng_state_history("Mudkip") is not history
+
+
+def test_rng_state_history_is_appended_to_the_file(tmp_path):
+    history = get_rng_state_history("Torchic")
+    history.update([5, 5])
+    history.add(5)
+    history.add(0x01020304)
+
+    assert (tmp_path / "rng" / "Torchic.bin").read_bytes() == bytes([5, 0, 0, 0, 4, 3, 2, 1])
@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+from modules.multi_instance import _prepare_worker_directory, get_worker_path
+
+
+def test_worker_files_are_kept_when_the_worker_directory_is_cleared(tmp_path):
+    profile = SimpleNamespace(path=tmp_path)
+    (tmp_path / "pokemon").mkdir()
+    (tmp_path / "pokemon" / "shiny.pk3").write_bytes(b"parent")
+
+    worker_path = get_worker_path(profile, 1)
+    (worker_path / "pokemon").mkdir(parents=True)
+    (worker_path / "pokemon" / "shiny.pk3").write_bytes(b"worker")
+    (worker_path / "states").mkdir()
+    (worker_path / "states" / "before_battle.ss1").write_bytes(b"state")
+
+    _prepare_worker_directory(profile, 1)
+
+    assert (tmp_path / "pokemon" / "shiny.pk3").read_bytes() == b"parent"
+    assert (tmp_path / "pokemon" / "shiny_instance1.pk3").read_bytes() == b"worker"
+    assert (tmp_path / "states" / "before_battle.ss1").read_bytes() == b"state"
+    assert list(worker_path.iterdir()) == []
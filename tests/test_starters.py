@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+
+from modules.config import config
+from modules.context import context
+from modules.memory import GameState
+
+
+class FakeEmulator:
+    def __init__(self):
+        self.snapshots: list[str] = []
+        self.restored_snapshots: list[str] = []
+        self.resets: int = 0
+
+    def create_snapshot(self, name: str) -> str:
+        self.snapshots.append(name)
+        return name
+
+    def restore_snapshot(self, snapshot_id: str) -> None:
+        self.restored_snapshots.append(snapshot_id)
+
+    def reset(self) -> None:
+        self.resets += 1
+
+    def press_button(self, button: str) -> None:
+        pass
+
+
+@pytest.fixture
+def emulator(monkeypatch: pytest.MonkeyPatch) -> FakeEmulator:
+    emulator = FakeEmulator()
+    monkeypatch.setattr(context, "emulator", emulator)
+    return emulator
+
+
+@pytest.fixture
+def starters(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    rom = SimpleNamespace(game_title="POKEMON EMER")
+    monkeypatch.setattr(context, "profile", SimpleNamespace(path=tmp_path, rom=rom))
+    # Importing this creates the `Trainer` instance, which needs to know the game.
+    from modules.modes import starters
+
+    monkeypatch.setitem(config, "general", {"starter": "Treecko"})
+    monkeypatch.setitem(
+        config, "cheats", {"starters": False, "starters_rng": False, "fast_reset": True, "starters_prediction": True}
+    )
+    monkeypatch.setattr(starters, "_sessions", {})
+    monkeypatch.setattr(starters, "owns_rng_seed", lambda rng: True)
+    monkeypatch.setattr(starters, "write_symbol", lambda name, data: None)
+    monkeypatch.setattr(starters, "get_game_state", lambda: GameState.OVERWORLD)
+    return starters
+
+
+def test_second_attempt_restores_the_fast_reset_snapshot(starters, emulator):
+    first_attempt = starters.ModeStarters()
+    next(first_attempt.step())
+    assert emulator.resets == 1
+
+    first_attempt.create_fast_reset_snapshot()
+
+    second_attempt = starters.ModeStarters()
+    next(second_attempt.step())
+    assert emulator.resets == 1
+    assert emulator.restored_snapshots == ["fast_reset"]
+
+
+def test_calibrated_prediction_carries_over_to_the_next_attempt(starters, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(starters, "find_pid_advance", lambda rng, personality_value, max_advances: 42)
+    starter = SimpleNamespace(personality_value=0x12345678)
+
+    for rng in (1, 2):
+        attempt = starters.ModeStarters()
+        assert attempt.should_play_out(rng)
+        attempt.calibrate_prediction(starter)
+
+    assert starters.ModeStarters().session.prediction_advance == 42
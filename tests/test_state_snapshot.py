@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+from modules.context import context
+from modules.state_snapshot import StatePublisher
+
+
+class FakeEmulator:
+    def __init__(self):
+        self.frame_count = 0
+
+    def get_frame_count(self) -> int:
+        return self.frame_count
+
+
+@pytest.fixture
+def emulator(monkeypatch: pytest.MonkeyPatch) -> FakeEmulator:
+    emulator = FakeEmulator()
+    monkeypatch.setattr(context, "emulator", emulator)
+    return emulator
+
+
+@pytest.fixture
+def publisher() -> StatePublisher:
+    publisher = StatePublisher()
+    publisher.min_publish_interval = 0
+    return publisher
+
+
+def test_publishes_every_n_frames(emulator, publisher):
+    data = SimpleNamespace(value=1)
+    publisher.add_source("test", lambda: data.value)
+
+    emulator.frame_count = publisher.publish_interval_frames
+    publisher.update()
+    assert publisher.get("test").data == 1
+
+    data.value = 2
+    emulator.frame_count += publisher.publish_interval_frames - 1
+    publisher.update()
+    assert publisher.get("test").data == 1
+
+    emulator.frame_count += 1
+    publisher.update()
+    assert publisher.get("test").data == 2
+    assert publisher.get("test").version == 2
+
+
+def test_publishes_after_restoring_a_snapshot(emulator, publisher):
+    data = SimpleNamespace(value=1)
+    publisher.add_source("test", lambda: data.value)
+
+    emulator.frame_count = 1000
+    publisher.update()
+    assert publisher.get("test").data == 1
+
+    # Restoring a snapshot (or resetting the emulator) makes the frame count go backwards.
+    data.value = 2
+    emulator.frame_count = 10
+    publisher.update()
+    assert publisher.get("test").data == 2
+
+    # After that, the usual interval applies again.
+    data.value = 3
+    emulator.frame_count += 1
+    publisher.update()
+    assert publisher.get("test").data == 2
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from modules.stats import TotalStats
+
+
+@pytest.fixture
+def total_stats() -> TotalStats:
+    # Only the stats themselves are needed here, so the constructor (which opens the profile's stats files
+    # and starts background threads) is skipped.
+    stats = TotalStats.__new__(TotalStats)
+    stats.total_stats = {
+        "totals": {"encounters": 2, "phase_encounters": 2},
+        "pokemon": {"Zigzagoon": {"encounters": 2, "phase_encounters": 2}},
+    }
+    return stats
+
+
+def test_snapshot_can_be_serialised(total_stats):
+    snapshot = total_stats.get_total_stats_snapshot()
+
+    assert json.loads(json.dumps(snapshot)) == total_stats.total_stats
+
+
+def test_changing_a_snapshot_does_not_change_the_stats(total_stats):
+    snapshot = total_stats.get_total_stats_snapshot()
+    snapshot["totals"]["encounters"] = 1000
+    snapshot["pokemon"]["Zigzagoon"]["encounters"] = 1000
+    snapshot["pokemon"]["Wurmple"] = {"encounters": 1}
+
+    assert total_stats.total_stats["totals"]["encounters"] == 2
+    assert total_stats.total_stats["pokemon"]["Zigzagoon"]["encounters"] == 2
+    assert "Wurmple" not in total_stats.total_stats["pokemon"]
+    assert total_stats.get_total_stats_snapshot()["pokemon"]["Zigzagoon"]["encounters"] == 2
+
+
+def test_hooks_get_a_copy_that_is_not_affected_by_later_encounters(total_stats):
+    received_hooks = []
+    total_stats.custom_hooks = received_hooks.append
+
+    shared_snapshot = total_stats._get_shared_stats_snapshot()
+    total_stats.detach_stats_from_snapshots("Zigzagoon")
+    total_stats.total_stats["totals"]["encounters"] += 1
+    total_stats.total_stats["pokemon"]["Zigzagoon"]["encounters"] += 1
+    total_stats._run_custom_hooks((None, shared_snapshot, ()))
+
+    stats = received_hooks[0][1]
+    assert stats["totals"]["encounters"] == 2
+    assert stats["pokemon"]["Zigzagoon"]["encounters"] == 2
+
+    stats["pokemon"]["Zigzagoon"]["encounters"] = 1000
+    assert total_stats.total_stats["pokemon"]["Zigzagoon"]["encounters"] == 3
+    assert json.dumps(stats)